@@ -0,0 +1,186 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from algorithms.graph import get_graph
+
+# 按实测死胡同概率划分难度档位：(档位, 上限)，依次匹配。
+# 阈值取自现有生成器各难度得分的分布（easy 多数为 0，hard 中位数约 0.22）
+DIFFICULTY_BUCKETS: Tuple[Tuple[str, float], ...] = (
+    ("easy", 0.1),
+    ("medium", 0.22),
+    ("hard", 1.0),
+)
+
+
+def _prepare(nodes: Sequence[int], edges: Sequence[Tuple[int, int]]):
+    """
+    把共享的 CSR 图（algorithms/graph.py）整理成 NumPy 数组：
+      labels  顶点编号 -> 原始标签
+      ends    (E, 2) 每条边的两个端点（顶点编号）
+      inc     (V, D) 每个顶点关联的边 id，不足 D 的位置填 -1
+      degree  (V,)   每个顶点的度数（自环计 2）
+    """
+    graph = get_graph(nodes, edges)
+    V = graph.vertex_count
+    ends = np.frombuffer(graph.ends, dtype=np.int32).astype(np.int64).reshape(-1, 2)
+    offsets = np.frombuffer(graph.offsets, dtype=np.int32).astype(np.int64)
+    degree = np.diff(offsets)
+    D = int(degree.max()) if V else 0
+    inc = np.full((V, max(D, 1)), -1, dtype=np.int64)
+    # CSR 第 k 项属于哪个顶点、是该顶点的第几项
+    rows = np.repeat(np.arange(V), degree)
+    cols = np.arange(len(rows)) - offsets[rows]
+    inc[rows, cols] = np.frombuffer(graph.adj_edge, dtype=np.int32)
+    return graph.labels, ends, inc, degree
+
+
+def simulate_players(nodes: Sequence[int], edges: Sequence[Tuple[int, int]], walkers: int = 1024,
+                     greedy: float = 0.5, seed: Optional[int] = 0) -> Optional[Dict[str, np.ndarray]]:
+    """
+    批量模拟玩家走图：每个玩家从合法起点出发，每步在未走过的关联边中随机选一条，
+    无路可走时停下。所有玩家同步推进，一步就是几次数组运算。
+
+    玩家分两种：
+      - 随机玩家：在可走的边里均匀随机选；
+      - 半贪心玩家：避开“走过去对面就没路了”的边（除非别无选择），其余随机。
+
+    Args:
+        nodes, edges: 关卡的顶点与边。
+        walkers (int): 模拟的玩家数。
+        greedy (float): 半贪心玩家所占比例。
+        seed (int | None): 随机种子，相同参数得到相同结果。
+
+    Returns:
+        None 表示图本身不可一笔画（奇数点个数不是 0 或 2）；否则返回各玩家的
+        steps（走了几条边）、greedy（是否半贪心）、last_choice（最后一次有选择时走的边 id）。
+    """
+    rng = np.random.default_rng(seed)
+    labels, ends, inc, degree = _prepare(nodes, edges)
+    E = len(ends)
+    odd = np.flatnonzero(degree % 2)
+    if len(odd) not in (0, 2):
+        return None
+    # 玩家知道规则：有奇数点就从奇数点出发，否则从任意有边的顶点出发
+    starts = odd if len(odd) else np.flatnonzero(degree)
+    if E == 0 or len(starts) == 0:
+        return {
+            "steps": np.zeros(walkers, dtype=np.int64),
+            "greedy": np.zeros(walkers, dtype=bool),
+            "last_choice": np.full(walkers, -1, dtype=np.int64),
+        }
+
+    ends_sum = ends.sum(axis=1)
+    pos = rng.choice(starts, size=walkers)
+    is_greedy = rng.random(walkers) < greedy
+    used = np.zeros((walkers, E), dtype=bool)
+    remaining = np.tile(degree, (walkers, 1))
+    steps = np.zeros(walkers, dtype=np.int64)
+    last_choice = np.full(walkers, -1, dtype=np.int64)
+    active = np.arange(walkers)
+
+    for _ in range(E):
+        here = pos[active]
+        cand = inc[here]
+        valid = cand >= 0
+        safe = np.where(valid, cand, 0)
+        rows = active[:, None]
+        valid &= ~used[rows, safe]
+        n_valid = valid.sum(axis=1)
+
+        moving = n_valid > 0
+        if not moving.all():
+            active, here, cand, valid, safe, n_valid = (
+                active[moving], here[moving], cand[moving], valid[moving], safe[moving], n_valid[moving]
+            )
+            rows = active[:, None]
+        if len(active) == 0:
+            break
+
+        keys = rng.random(cand.shape)
+        # 半贪心：走过去之后对面度数归零（即走进死角）的边排到最后
+        far = ends_sum[safe] - here[:, None]
+        leaf = (remaining[rows, far] - 1) == 0
+        keys -= leaf & is_greedy[active][:, None]
+        keys[~valid] = -2.0
+        edge = safe[np.arange(len(active)), keys.argmax(axis=1)]
+
+        used[active, edge] = True
+        remaining[active, ends[edge, 0]] -= 1
+        remaining[active, ends[edge, 1]] -= 1
+        decided = n_valid > 1
+        last_choice[active[decided]] = edge[decided]
+        pos[active] = ends_sum[edge] - here
+        steps[active] += 1
+
+    return {"steps": steps, "greedy": is_greedy, "last_choice": last_choice}
+
+
+def score_level(nodes: Sequence[int], edges: Sequence[Tuple[int, int]], walkers: int = 1024,
+                greedy: float = 0.5, seed: Optional[int] = 0, top_traps: int = 5) -> Dict[str, Any]:
+    """
+    用蒙特卡洛模拟给关卡打分。
+
+    Returns:
+        dict: {
+            "solvable": 是否可一笔画,
+            "walkers": 模拟玩家数,
+            "dead_end_probability": 一次尝试走进死胡同的概率（全部玩家）,
+            "random_dead_end_probability" / "greedy_dead_end_probability": 两类玩家分别的概率,
+            "expected_resets": 通关前的期望重置次数 (1 - s) / s，从未通关时为 None,
+            "trap_edges": [{"edge": [u, v], "share": 占失败次数的比例}, ...],
+            "bucket": 按 DIFFICULTY_BUCKETS 划分的档位,
+        }
+        陷阱边指失败的玩家最后一次“有得选”时走的那条边——通常就是走错的那一步。
+    """
+    result = simulate_players(nodes, edges, walkers=walkers, greedy=greedy, seed=seed)
+    if result is None:
+        return {
+            "solvable": False,
+            "walkers": walkers,
+            "dead_end_probability": 1.0,
+            "random_dead_end_probability": 1.0,
+            "greedy_dead_end_probability": 1.0,
+            "expected_resets": None,
+            "trap_edges": [],
+            "bucket": DIFFICULTY_BUCKETS[-1][0],
+        }
+
+    success = result["steps"] == len(edges)
+    is_greedy = result["greedy"]
+    failures = ~success
+
+    def dead_end_rate(mask: np.ndarray) -> float:
+        return float(failures[mask].mean()) if mask.any() else 0.0
+
+    p_fail = float(failures.mean())
+    p_success = 1.0 - p_fail
+    trap_edges: List[Dict[str, Any]] = []
+    chosen = result["last_choice"][failures]
+    chosen = chosen[chosen >= 0]
+    if len(chosen):
+        counts = np.bincount(chosen, minlength=len(edges))
+        for e in np.argsort(-counts, kind="stable")[:top_traps]:
+            if counts[e] == 0:
+                break
+            a, b = edges[e]
+            trap_edges.append({"edge": [a, b], "share": round(float(counts[e]) / int(failures.sum()), 4)})
+
+    return {
+        "solvable": True,
+        "walkers": walkers,
+        "dead_end_probability": p_fail,
+        "random_dead_end_probability": dead_end_rate(~is_greedy),
+        "greedy_dead_end_probability": dead_end_rate(is_greedy),
+        "expected_resets": p_fail / p_success if p_success > 0 else None,
+        "trap_edges": trap_edges,
+        "bucket": difficulty_bucket(p_fail),
+    }
+
+
+def difficulty_bucket(dead_end_probability: float) -> str:
+    """按死胡同概率返回难度档位名。"""
+    for name, upper in DIFFICULTY_BUCKETS:
+        if dead_end_probability <= upper:
+            return name
+    return DIFFICULTY_BUCKETS[-1][0]
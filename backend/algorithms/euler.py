@@ -1,219 +1,425 @@
-from collections import defaultdict
-from typing import List, Tuple, Optional, Dict, Set
+from typing import List, Tuple, Optional, Dict, Set, Iterable, Iterator
+
+from algorithms.graph import Graph, get_graph, get_graph_flat
+from services.metrics import timed
 
 # --- 原始的 "找完整路径" 算法 (保留) ---
 def find_euler_path(nodes, edges):
-    graph = defaultdict(list)
+    """
+    Hierholzer 算法求欧拉路径/回路，O(V+E)。
+
+    图先转成共享的 CSR 结构（algorithms/graph.py，按关卡缓存），边编号即输入下标；
+    用 bytearray 标记边是否已走过，每个顶点维护一个游标指向下一条待检查的关联项，
+    因此每条边最多被检查两次，不再需要 list.remove 的线性扫描。
+    支持重复边与自环。图不满足欧拉条件（奇度点数不为 0/2 或边不连通）时返回 None。
+    """
     if not edges: return []
-    for a, b in edges:
-        graph[a].append(b)
-        graph[b].append(a)
-
-    odd = [n for n in nodes if n in graph and len(graph[n]) % 2 == 1]
-    fallback_start = None
-    if nodes:
-        for n in nodes:
-            if n in graph and graph[n]: 
-                fallback_start = n
-                break
-    start = odd[0] if odd else (fallback_start if fallback_start else None)
-    if start is None: return [] 
+    return find_euler_path_flat(nodes, [x for edge in edges for x in edge])
+
+
+def find_euler_path_flat(nodes, ends):
+    """
+    同 find_euler_path，但边以扁平整数序列 [u0, v0, u1, v1, ...] 给出。
+    可以直接传入二进制请求体上的 memoryview（见 services/wire.py），不必先复制成元组列表。
+    """
+    if len(ends) < 2: return []
+    graph = get_graph_flat(nodes, ends)
+    path = euler_path_ids(graph)
+    if path is None:
+        return None
+    labels = graph.labels
+    return [labels[v] for v in path]
+
 
+@timed("euler")
+def euler_path_ids(graph: Graph) -> Optional[List[int]]:
+    """在 CSR 图上跑迭代版 Hierholzer，返回稠密顶点编号序列；不满足欧拉条件时返回 None。"""
+    edge_count = graph.edge_count
+    offsets, adj_edge, adj_nbr = graph.offsets, graph.adj_edge, graph.adj_nbr
+    degree = graph.degrees()
+
+    # 1. 确定起点：有奇度点取第一个奇度点，否则取第一个有边的顶点（nodes 里的顶点优先）
+    odd = [v for v, d in enumerate(degree) if d % 2 == 1]
+    if len(odd) not in (0, 2):
+        return None
+    candidates = [v for v in range(graph.node_count) if degree[v]] or [v for v, d in enumerate(degree) if d]
+    if odd:
+        start = next((v for v in candidates if degree[v] % 2 == 1), odd[0])
+    else:
+        start = candidates[0]
+
+    # 2. 迭代版 Hierholzer：used 标记已走的边，cursor[v] 指向 v 下一条待检查的关联项
+    used = bytearray(edge_count)
+    cursor = offsets[:-1].tolist()
     stack = [start]
     path = []
-    local_graph = {k: list(v) for k, v in graph.items()}
     while stack:
         v = stack[-1]
-        if v in local_graph and local_graph[v]:
-            u = local_graph[v].pop()
-            try:
-                if v in local_graph[u]: # Check if u still exists in graph
-                    local_graph[u].remove(v)
-            except (KeyError, ValueError):
-                pass 
-            stack.append(u)
+        i = cursor[v]
+        end = offsets[v + 1]
+        while i < end and used[adj_edge[i]]:
+            i += 1
+        if i < end:
+            cursor[v] = i + 1
+            used[adj_edge[i]] = 1
+            stack.append(adj_nbr[i])
         else:
+            cursor[v] = i
             path.append(stack.pop())
+
+    # 边不连通时只能走完起点所在的分量
+    if len(path) != edge_count + 1:
+        return None
     return path[::-1]
 
+# --- V V V --- 最少笔画分解（多笔画关卡）--- V V V ---
+
+def find_min_strokes(nodes, edges):
+    """
+    把图（可以不连通）拆成最少条边不重复的轨迹，返回顶点序列的列表。
+    每个连通分量：没有奇数点时是一条回路，否则恰好 奇数点数/2 条轨迹。
+    """
+    return find_min_strokes_flat(nodes, [x for edge in edges for x in edge])
+
+
+def find_min_strokes_flat(nodes, ends):
+    """同 find_min_strokes，但边以扁平整数序列 [u0, v0, u1, v1, ...] 给出。"""
+    if len(ends) < 2: return []
+    graph = get_graph_flat(nodes, ends)
+    labels = graph.labels
+    return [[labels[v] for v in trail] for trail in min_stroke_ids(graph)]
+
+
+@timed("strokes")
+def min_stroke_ids(graph: Graph) -> List[List[int]]:
+    """
+    最少笔画分解，O(V+E)，返回稠密顶点编号序列的列表。
+    每个分量至少需要 max(1, 奇数点数/2) 笔，这里恰好达到下界：
+    分量内奇数点依次为 o0..o(k-1)，在 (o1,o2)、(o3,o4)… 之间加虚拟边，只剩 o0、o(k-1) 两个奇数点，
+    从 o0 跑一遍 Hierholzer 得到欧拉路径，再在虚拟边处切开。
+    每个奇数点最多连一条虚拟边，所以切出的每一段都至少有一条真实边。
+    虚拟边不进 CSR，只记在 partner 表里：顶点的真实边走完后才走它的虚拟边。
+    """
+    offsets, adj_edge, adj_nbr = graph.offsets, graph.adj_edge, graph.adj_nbr
+    degree = graph.degrees()
+
+    # 1. 按顶点编号顺序找出各分量，确定起点并配好虚拟边
+    component = bytearray(graph.vertex_count)
+    starts = []
+    partner: Dict[int, int] = {}
+    for root in range(graph.vertex_count):
+        if component[root] or not degree[root]:
+            continue
+        component[root] = 1
+        stack = [root]
+        odd = []
+        while stack:
+            v = stack.pop()
+            if degree[v] % 2 == 1:
+                odd.append(v)
+            for i in range(offsets[v], offsets[v + 1]):
+                u = adj_nbr[i]
+                if not component[u]:
+                    component[u] = 1
+                    stack.append(u)
+        for j in range(1, len(odd) - 1, 2):
+            partner[odd[j]] = odd[j + 1]
+            partner[odd[j + 1]] = odd[j]
+        starts.append(odd[0] if odd else root)
+
+    # 2. 每个分量一遍 Hierholzer；virtual[j] 记录栈中第 j 个顶点是否经虚拟边到达
+    used = bytearray(graph.edge_count)
+    cursor = offsets[:-1].tolist()
+    strokes: List[List[int]] = []
+    for start in starts:
+        stack = [start]
+        virtual = [False]
+        path = []
+        arrived = []
+        while stack:
+            v = stack[-1]
+            i = cursor[v]
+            end = offsets[v + 1]
+            while i < end and used[adj_edge[i]]:
+                i += 1
+            if i < end:
+                cursor[v] = i + 1
+                used[adj_edge[i]] = 1
+                stack.append(adj_nbr[i])
+                virtual.append(False)
+                continue
+            cursor[v] = i
+            u = partner.pop(v, None)
+            if u is not None:
+                del partner[u]
+                stack.append(u)
+                virtual.append(True)
+            else:
+                path.append(stack.pop())
+                arrived.append(virtual.pop())
+
+        # 3. 出栈序列中 path[j] 与 path[j+1] 之间的边就是 path[j] 入栈时走的边，遇到虚拟边就切开
+        trail = [path[-1]]
+        for j in range(len(path) - 2, -1, -1):
+            if arrived[j]:
+                strokes.append(trail)
+                trail = [path[j]]
+            else:
+                trail.append(path[j])
+        strokes.append(trail)
+    return strokes
+
 # --- V V V --- 恢复的 "智能提示" 算法 (检查桥) --- V V V ---
 
-def _dfs_count(graph: Dict[int, List[int]], start_node: int, visited_nodes: Set[int]) -> int:
+def _find_bridges(graph: Graph, start: int, alive: bytearray) -> Tuple[Set[int], int]:
     """
-    辅助函数：使用 DFS 计算连通分量的大小
+    辅助函数：迭代版 Tarjan lowlink，一次 DFS 找出 start 所在连通分量中
+    所有剩余边里的桥（按边编号返回），同时统计该分量内的剩余边数。
+    按边编号跳过父边，因此重复边不会被误判为桥；不使用递归，长路径不会栈溢出。
     """
-    count = 1
-    visited_nodes.add(start_node)
-    # 确保 start_node 在图中存在
-    if start_node in graph:
-        for neighbor in graph[start_node]:
-            if neighbor not in visited_nodes:
-                count += _dfs_count(graph, neighbor, visited_nodes)
-    return count
+    offsets, adj_edge, adj_nbr = graph.offsets, graph.adj_edge, graph.adj_nbr
+    disc = [-1] * graph.vertex_count
+    low = [0] * graph.vertex_count
+    disc[start] = 0
+    visited = 1
+    bridges: Set[int] = set()
+    seen_edge_ends = 0
+    # 栈帧: [顶点, 进入该顶点的边编号, 关联项游标]
+    stack = [[start, -1, offsets[start]]]
+    while stack:
+        frame = stack[-1]
+        v, parent_edge, i = frame
+        end = offsets[v + 1]
+        descended = False
+        while i < end:
+            eid = adj_edge[i]
+            u = adj_nbr[i]
+            i += 1
+            if not alive[eid]:
+                continue
+            seen_edge_ends += 1
+            if eid == parent_edge:
+                continue
+            if disc[u] >= 0:
+                if disc[u] < low[v]:
+                    low[v] = disc[u]
+            else:
+                frame[2] = i
+                disc[u] = low[u] = visited
+                visited += 1
+                stack.append([u, eid, offsets[u]])
+                descended = True
+                break
+        if descended:
+            continue
+        stack.pop()
+        if stack:
+            p = stack[-1][0]
+            if low[v] < low[p]:
+                low[p] = low[v]
+            if low[v] > disc[p]:
+                bridges.add(parent_edge)
+    return bridges, seen_edge_ends // 2
 
-def find_next_step(nodes: List[int], 
-                   edges: List[Tuple[int, int]], 
-                   visitedEdges: List[str], 
-                   pathEndpoint: Optional[int]) -> Tuple[Optional[Tuple[int, int]], Optional[str]]:
-    
-    # 1. 建立完整的图
-    full_graph = defaultdict(list)
-    all_edges_set: Set[Tuple[int, int]] = set()
-    for a, b in edges:
-        full_graph[a].append(b)
-        full_graph[b].append(a)
-        all_edges_set.add(tuple(sorted((a, b))))
-
-    # 2. 建立已访问边的集合
-    visited_set: Set[Tuple[int, int]] = set()
-    # 【修复】需要记录每条边被访问了多少次 (处理重复边)
-    visited_count = defaultdict(int) 
+
+def _classify_edges(graph: Graph, start: int, alive: bytearray, remaining: int) -> Dict[str, List[int]]:
+    """
+    辅助函数：把 start 上所有剩余边分为三类（按边编号）：
+      safe     —— 非桥，走了之后剩余边仍连通
+      bridge   —— 桥，但它是当前端点唯一的出路，必须走
+      dead_end —— 走了会把剩余边割裂开，之后必然卡住
+    """
+    # 自环在关联表里出现两次，按边编号去重
+    incident = graph.adj_edge[graph.offsets[start]:graph.offsets[start + 1]]
+    moves = list(dict.fromkeys(eid for eid in incident if alive[eid]))
+    result: Dict[str, List[int]] = {"safe": [], "bridge": [], "dead_end": []}
+    if not moves:
+        return result
+
+    bridges, reachable = _find_bridges(graph, start, alive)
+    non_bridge_moves = [eid for eid in moves if eid not in bridges]
+    bridge_moves = [eid for eid in moves if eid in bridges]
+    if reachable < remaining:
+        # 有剩余边已经不在当前端点所在的连通分量里，无论怎么走都无法通关
+        result["dead_end"] = non_bridge_moves + bridge_moves
+    elif non_bridge_moves:
+        result["safe"] = non_bridge_moves
+        result["dead_end"] = bridge_moves
+    elif len(bridge_moves) == 1:
+        result["bridge"] = bridge_moves
+    else:
+        result["dead_end"] = bridge_moves
+    return result
+
+
+class GameState:
+    """
+    一局游戏的增量状态：剩余多重图、剩余度数、当前端点以及走过的边（用于撤销）。
+    每走一步 / 撤销一步只改动一条边，开销 O(1)（不计重复边条数）；
+    提示只需在剩余图上做一次 Tarjan，不必再从 visitedEdges 重建整张图。
+    图结构本身（CSR）按关卡缓存、多局共享，这里只保存每局自己的可变状态。
+    """
+
+    def __init__(self, nodes: List[int], edges: Iterable[Tuple[int, int]], graph: Optional[Graph] = None):
+        self.graph = graph if graph is not None else get_graph(nodes, edges)
+        self.alive = bytearray(b"\x01") * self.graph.edge_count
+        self.remaining = self.graph.edge_count
+        # 剩余度数，按稠密编号
+        self.degree = self.graph.degrees()
+        # 当前端点（原始标签）
+        self.endpoint: Optional[int] = None
+        # 走过的边: [(eid, 出发点), ...]
+        self.history: List[Tuple[int, int]] = []
+
+    def _take(self, a: int, b: int) -> Optional[int]:
+        graph = self.graph
+        ia, ib = graph.index.get(a), graph.index.get(b)
+        if ia is None or ib is None:
+            return None
+        for eid in graph.pairs.get(graph.pair_key(ia, ib), ()):
+            if self.alive[eid]:
+                self.alive[eid] = 0
+                self.remaining -= 1
+                self.degree[ia] -= 1
+                self.degree[ib] -= 1
+                return eid
+        return None
+
+    def move(self, to: int, start: Optional[int] = None) -> Optional[str]:
+        """
+        从当前端点（第一步时为 start）走到 to。成功返回 None，否则返回错误信息。
+        """
+        frm = self.endpoint if self.endpoint is not None else start
+        if frm is None:
+            return "第一步需要指定起点"
+        eid = self._take(frm, to)
+        if eid is None:
+            return f"边 {frm}-{to} 不存在或已走过"
+        self.history.append((eid, frm))
+        self.endpoint = to
+        return None
+
+    def undo(self) -> bool:
+        """撤销最后一步，没有可撤销的步骤时返回 False。"""
+        if not self.history:
+            return False
+        eid, frm = self.history.pop()
+        ends = self.graph.ends
+        self.alive[eid] = 1
+        self.remaining += 1
+        self.degree[ends[2 * eid]] += 1
+        self.degree[ends[2 * eid + 1]] += 1
+        self.endpoint = frm if self.history else None
+        return True
+
+    def visited_edges(self) -> List[str]:
+        keys = []
+        labels, ends = self.graph.labels, self.graph.ends
+        for eid, _ in self.history:
+            a, b = labels[ends[2 * eid]], labels[ends[2 * eid + 1]]
+            keys.append(f"{a}-{b}" if a < b else f"{b}-{a}")
+        return keys
+
+    @timed("bridges")
+    def classify(self) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        对当前端点的每条剩余边做 safe / bridge / dead_end 分类。
+        返回 ({"from": 端点, "safe": [[from, to], ...], "bridge": [...], "dead_end": [...]}, None)
+        或 (None, 提示信息)。
+        """
+        graph = self.graph
+        # 1. 确定起点
+        start_node = self.endpoint
+        if start_node is None:
+            degree = graph.degrees()
+            odd_nodes = [v for v in range(graph.node_count) if degree[v] % 2 == 1]
+            # 检查图是否可解（理论上关卡生成已保证）
+            if len(odd_nodes) not in (0, 2):
+                return None, "此图无解 (奇数点错误)"
+            fallback_start = next((v for v in range(graph.node_count) if degree[v]), None)
+            start = odd_nodes[0] if odd_nodes else fallback_start
+            if start is None:
+                return None, "空关卡或无有效起点"
+            start_node = graph.labels[start]
+        else:
+            start = graph.index.get(start_node)
+
+        # 2. 检查是否通关或卡住
+        if self.remaining == 0:
+            return None, "🎉 恭喜通关！"
+        if start is None or not self.degree[start]:
+            return None, "你似乎走进了死胡同，请重置"
+
+        # 3. 一次 Tarjan 遍历完成分类
+        labels, ends = graph.labels, graph.ends
+        classes = _classify_edges(graph, start, self.alive, self.remaining)
+        classification: Dict = {"from": start_node}
+        for name, eids in classes.items():
+            # 重复边指向同一个邻居，只保留一次
+            targets = dict.fromkeys(
+                labels[ends[2 * eid + 1] if ends[2 * eid] == start else ends[2 * eid]] for eid in eids
+            )
+            classification[name] = [[start_node, to] for to in targets]
+        return classification, None
+
+
+def parse_edge_keys(visitedEdges: Iterable[str]) -> Iterator[Tuple[int, int]]:
+    """把 ["1-2", "2-3"] 解析为 (1, 2), (2, 3)，格式不对的项跳过。"""
     for key in visitedEdges:
         try:
             a, b = map(int, key.split('-'))
-            edge_tuple = tuple(sorted((a, b)))
-            visited_set.add(edge_tuple) # 仍然用 set 快速检查是否存在
-            visited_count[edge_tuple] += 1 # 计数
         except ValueError:
-            pass
-
-    # 3. 确定起点
-    start_node = pathEndpoint
-    if start_node is None: 
-        odd_nodes = [n for n in nodes if n in full_graph and len(full_graph[n]) % 2 == 1]
-        # 检查图是否可解（理论上关卡生成已保证）
-        if len(odd_nodes) not in (0, 2):
-            return None, "此图无解 (奇数点错误)"
-        
-        fallback_start = None
-        if nodes:
-            for n in nodes:
-                 if n in full_graph and full_graph[n]: 
-                      fallback_start = n
-                      break
-                      
-        start_node = odd_nodes[0] if odd_nodes else (fallback_start if fallback_start else None)
-        if start_node is None:
-            return None, "空关卡或无有效起点"
-
-    # 4. 找到所有 "未完全访问" 的下一步
-    valid_moves = []
-    # 【修复】需要知道图中每条边总共出现了多少次
-    total_edge_count = defaultdict(int)
-    for a,b in edges:
-        total_edge_count[tuple(sorted((a,b)))] += 1
-        
-    if start_node in full_graph:
-        for neighbor in full_graph[start_node]:
-            edge_tuple = tuple(sorted((start_node, neighbor)))
-            # 如果这条边还没被访问过，或者访问次数小于总次数
-            if visited_count[edge_tuple] < total_edge_count[edge_tuple]:
-                valid_moves.append(neighbor)
-
-    # 5. 检查是否卡住或通关
-    if not valid_moves:
-        # 【修复】检查是否所有边都被访问了 *正确的次数*
-        all_visited_correctly = True
-        for edge_tuple, count in total_edge_count.items():
-            if visited_count[edge_tuple] != count:
-                all_visited_correctly = False
-                break
-                
-        if all_visited_correctly:
-            return None, "🎉 恭喜通关！"
-        else:
-            return None, "你似乎走进了死胡同，请重置"
+            continue
+        yield a, b
 
-    # 6. 检查“桥”
-    # 6a. 建立只包含 "剩余边" 的图 (考虑重复边)
-    remaining_graph = defaultdict(list)
-    remaining_edge_counts = defaultdict(int) # 需要追踪剩余数量
-    for a, b in edges:
-         edge_tuple = tuple(sorted((a,b)))
-         remaining_count = total_edge_count[edge_tuple] - visited_count[edge_tuple]
-         if remaining_count > 0 and edge_tuple not in remaining_edge_counts: # 只添加一次邻接关系
-              remaining_graph[a].append(b)
-              remaining_graph[b].append(a)
-              remaining_edge_counts[edge_tuple] = remaining_count # 记录剩余次数
-
-    # 6b. 遍历可走的下一步，找非桥
-    non_bridge_moves = []
-    bridge_moves = []
-
-    # 统计当前连通分量的大小 (只考虑有剩余边的节点)
-    nodes_in_remaining_graph = set(remaining_graph.keys())
-    if not nodes_in_remaining_graph: # 没有剩余边了
-         if all_visited_correctly: return None, "🎉 恭喜通关！"
-         else: return None, "内部错误：无剩余边但未通关"
-         
-    # 找到一个有效的起始节点进行DFS
-    dfs_start_node = start_node if start_node in nodes_in_remaining_graph else next(iter(nodes_in_remaining_graph))
-    
-    visited_nodes_before = set()
-    initial_component_size = _dfs_count(remaining_graph, dfs_start_node, visited_nodes_before)
-
-
-    for next_node in valid_moves:
-        edge_tuple = tuple(sorted((start_node, next_node)))
-        
-        # 6c. 如果这是唯一出路，必须走
-        # 【修复】检查 start_node 在 remaining_graph 中的有效邻居数量
-        valid_remaining_neighbors = 0
-        if start_node in remaining_graph:
-             for neighbor in remaining_graph[start_node]:
-                  check_tuple = tuple(sorted((start_node, neighbor)))
-                  if remaining_edge_counts[check_tuple] > 0:
-                       valid_remaining_neighbors += 1
-
-        if valid_remaining_neighbors == 1:
-            return (start_node, next_node), None
-
-        # 6d. 模拟移除这条边
-        remaining_graph[start_node].remove(next_node)
-        remaining_graph[next_node].remove(start_node)
-        remaining_edge_counts[edge_tuple] -= 1 # 减少计数
-        # 如果这条边彻底没了，更新邻接表
-        should_re_add_adjacency = True
-        if remaining_edge_counts[edge_tuple] == 0:
-            # 检查是否还有其他边连接这两个节点（理论上不会，因为我们只处理非重复邻接）
-             pass # 邻接关系已移除
-        else:
-             # 如果还有重复边，需要把邻接关系加回去，否则DFS会出错
-             remaining_graph[start_node].append(next_node)
-             remaining_graph[next_node].append(start_node)
-             should_re_add_adjacency = False
-
-
-        # 6e. 检查连通性
-        visited_nodes_after = set()
-        # 需要找到一个新的有效起始点，因为start_node可能因移除边而孤立
-        new_dfs_start = start_node if start_node in remaining_graph and remaining_graph[start_node] else next_node if next_node in remaining_graph and remaining_graph[next_node] else None
-        
-        component_size_after = 0
-        if new_dfs_start:
-             component_size_after = _dfs_count(remaining_graph, new_dfs_start, visited_nodes_after)
-        
-        # is_bridge = component_size_after < initial_component_size # 简单检查
-        # 更严格的检查：next_node 是否仍在 start_node 的连通分量里？
-        is_bridge = (new_dfs_start is None) or (next_node not in visited_nodes_after and start_node in visited_nodes_after)
-
-        # 6f. 恢复图
-        if should_re_add_adjacency: # 只有当邻接关系被彻底移除时才加回
-            remaining_graph[start_node].append(next_node)
-            remaining_graph[next_node].append(start_node)
-        remaining_edge_counts[edge_tuple] += 1 # 恢复计数
-        
-        if not is_bridge:
-            non_bridge_moves.append(next_node)
-        else:
-            bridge_moves.append(next_node)
-
-    # 7. 优先走非桥
-    if non_bridge_moves:
-        return (start_node, non_bridge_moves[0]), None
-    elif bridge_moves: # 否则走桥
-        return (start_node, bridge_moves[0]), None
-    else: # 理论上不应该到这里
-         return None, "内部错误：无法确定下一步"
+
+def classify_next_moves(nodes: List[int],
+                        edges: List[Tuple[int, int]],
+                        visitedEdges: List[str],
+                        pathEndpoint: Optional[int]) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    对当前端点的每条剩余边做 safe / bridge / dead_end 分类。
+    只做一次 Tarjan 遍历，整体 O(V+E)。
+    """
+    return classify_after(nodes, edges, parse_edge_keys(visitedEdges), pathEndpoint)
+
+
+def classify_after(nodes: List[int],
+                   edges: Iterable[Tuple[int, int]],
+                   visited: Iterable[Tuple[int, int]],
+                   pathEndpoint: Optional[int]) -> Tuple[Optional[Dict], Optional[str]]:
+    """同 classify_next_moves，但走过的边直接以 (a, b) 对给出（二进制请求不必拼字符串再解析）。"""
+    state = GameState(nodes, edges)
+    # 按访问次数依次消耗同一对顶点之间的边 (处理重复边)，剩下的就是 "剩余边"
+    for a, b in visited:
+        state._take(a, b)
+    state.endpoint = pathEndpoint
+    return state.classify()
+
+
+def pick_next_move(classification: Dict) -> Optional[Tuple[int, int]]:
+    """
+    按 safe -> bridge -> dead_end 的优先级从分类结果中挑出推荐的下一步。
+    """
+    for name in ("safe", "bridge", "dead_end"):
+        if classification[name]:
+            return tuple(classification[name][0])
+    return None
+
+
+def find_next_step(nodes: List[int], 
+                   edges: List[Tuple[int, int]], 
+                   visitedEdges: List[str], 
+                   pathEndpoint: Optional[int]) -> Tuple[Optional[Tuple[int, int]], Optional[str]]:
+    """
+    智能提示：优先走非桥；若只有唯一出路则必须走；否则只能走进死胡同。
+    """
+    classification, err = classify_next_moves(nodes, edges, visitedEdges, pathEndpoint)
+    if err:
+        return None, err
+    move = pick_next_move(classification)
+    if move is None:
+        return None, "内部错误：无法确定下一步"
+    return move, None
 
 # --- ^ ^ ^ --- "智能提示" 算法结束 --- ^ ^ ^ ---
\ No newline at end of file
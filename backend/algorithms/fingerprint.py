@@ -0,0 +1,41 @@
+import hashlib
+import os
+from functools import lru_cache
+from itertools import chain
+from typing import Iterable, List, Sequence, Tuple
+
+# 按原始顺序记住最近算过的指纹；边数超过上限的图不记（与 algorithms.graph 的图缓存一致）
+FINGERPRINT_CACHE_SIZE = int(os.getenv("FINGERPRINT_CACHE_SIZE", "1024"))
+FINGERPRINT_CACHE_MAX_EDGES = int(os.getenv("FINGERPRINT_CACHE_MAX_EDGES", "20000"))
+
+
+def canonical_edges(edges: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """把边规范化为 (小, 大) 并排序；重复边保留（按多重集合处理）。"""
+    return sorted((a, b) if a < b else (b, a) for a, b in edges)
+
+
+def graph_fingerprint(nodes: Iterable[int], edges: Iterable[Tuple[int, int]]) -> str:
+    """
+    图的规范指纹：排序后的顶点集合 + 排序后的边多重集合，取 blake2b 摘要。
+    与边的书写顺序、端点顺序无关；同一张图无论从哪里来都得到同一个指纹。
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(",".join(map(str, sorted(set(nodes)))).encode())
+    h.update(b"|")
+    h.update(",".join(f"{a}-{b}" for a, b in canonical_edges(edges)).encode())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)
+def _cached_fingerprint(nodes: Tuple[int, ...], flat_edges: Tuple[int, ...]) -> str:
+    return graph_fingerprint(nodes, zip(flat_edges[::2], flat_edges[1::2]))
+
+
+def request_fingerprint(nodes: Sequence[int], edges: Sequence[Sequence[int]]) -> str:
+    """
+    同 graph_fingerprint，但以请求里的原始顺序为键记住结果：同一关卡反复请求提示时，
+    只需把数据转成元组查一次表，不必每次重新排序、拼接字符串。
+    """
+    if len(edges) > FINGERPRINT_CACHE_MAX_EDGES:
+        return graph_fingerprint(nodes, edges)
+    return _cached_fingerprint(tuple(nodes), tuple(chain.from_iterable(edges)))
@@ -0,0 +1,144 @@
+import os
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from services.metrics import timed
+
+# 最多缓存多少张图；边数超过上限的图不缓存（一次性的大图不值得常驻内存）
+GRAPH_CACHE_SIZE = int(os.getenv("GRAPH_CACHE_SIZE", "1024"))
+GRAPH_CACHE_MAX_EDGES = int(os.getenv("GRAPH_CACHE_MAX_EDGES", "20000"))
+
+
+class Graph:
+    """
+    只读的 CSR（压缩邻接表）多重图，求解、提示、难度评分共用。
+
+    顶点重新编号为 0..V-1 的稠密整数：先按 nodes 的顺序，再按边里第一次出现的顺序补上
+    不在 nodes 中的端点。边编号即它在输入中的下标。
+      labels    稠密编号 -> 原始顶点标签
+      index     原始标签 -> 稠密编号
+      ends      array('i')，长 2E，第 e 条边的两个端点是 ends[2e], ends[2e+1]
+      offsets   array('i')，长 V+1，顶点 v 的关联项在 [offsets[v], offsets[v+1]) 区间
+      adj_edge  array('i')，长 2E，关联边编号（按边编号升序；自环出现两次）
+      adj_nbr   array('i')，长 2E，与 adj_edge 对应的另一个端点
+    图本身不可变，走过哪些边等可变状态由调用方另外保存（bytearray / 游标），
+    因此同一张图可以被多个请求、多个线程同时使用。
+    """
+
+    __slots__ = ("labels", "index", "node_count", "edge_count", "ends", "offsets",
+                 "adj_edge", "adj_nbr", "_pairs")
+
+    def __init__(self, nodes: Iterable[int], flat_edges: Sequence[int]):
+        index: Dict[int, int] = {}
+        labels: List[int] = []
+        for n in nodes:
+            if n not in index:
+                index[n] = len(labels)
+                labels.append(n)
+        self.node_count = len(labels)
+        edge_count = len(flat_edges) // 2
+        ends = array("i", bytes(8 * edge_count))
+        for k in range(2 * edge_count):
+            x = flat_edges[k]
+            i = index.get(x)
+            if i is None:
+                i = index[x] = len(labels)
+                labels.append(x)
+            ends[k] = i
+        V = len(labels)
+
+        # 计数排序建 CSR：先数度数，再按边编号顺序依次填入
+        offsets = array("i", bytes(4 * (V + 1)))
+        for x in ends:
+            offsets[x + 1] += 1
+        for v in range(V):
+            offsets[v + 1] += offsets[v]
+        fill = offsets[:-1].tolist()
+        adj_edge = array("i", bytes(8 * edge_count))
+        adj_nbr = array("i", bytes(8 * edge_count))
+        for eid in range(edge_count):
+            a, b = ends[2 * eid], ends[2 * eid + 1]
+            p = fill[a]
+            adj_edge[p] = eid
+            adj_nbr[p] = b
+            fill[a] = p + 1
+            p = fill[b]
+            adj_edge[p] = eid
+            adj_nbr[p] = a
+            fill[b] = p + 1
+
+        self.labels = labels
+        self.index = index
+        self.edge_count = edge_count
+        self.ends = ends
+        self.offsets = offsets
+        self.adj_edge = adj_edge
+        self.adj_nbr = adj_nbr
+        self._pairs: Optional[Dict[int, List[int]]] = None
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.labels)
+
+    def degrees(self) -> List[int]:
+        offsets = self.offsets
+        return [offsets[v + 1] - offsets[v] for v in range(len(self.labels))]
+
+    def pair_key(self, a: int, b: int) -> int:
+        """一对稠密顶点（无序）的整数键，不为每条边分配元组。"""
+        return a * len(self.labels) + b if a <= b else b * len(self.labels) + a
+
+    @property
+    def pairs(self) -> Dict[int, List[int]]:
+        """同一对顶点之间的所有边编号（即重复边），首次使用时才建立。"""
+        if self._pairs is None:
+            pairs: Dict[int, List[int]] = {}
+            ends = self.ends
+            for eid in range(self.edge_count):
+                pairs.setdefault(self.pair_key(ends[2 * eid], ends[2 * eid + 1]), []).append(eid)
+            self._pairs = pairs
+        return self._pairs
+
+    def multiplicity(self, a: int, b: int) -> int:
+        """顶点 a、b（原始标签）之间的边数。"""
+        ia, ib = self.index.get(a), self.index.get(b)
+        if ia is None or ib is None:
+            return 0
+        return len(self.pairs.get(self.pair_key(ia, ib), ()))
+
+
+@timed("graph_build")
+def _build_graph(nodes: Sequence[int], flat_edges: Sequence[int]) -> Graph:
+    return Graph(nodes, flat_edges)
+
+
+@lru_cache(maxsize=GRAPH_CACHE_SIZE)
+def _cached_graph(nodes: Tuple[int, ...], flat_edges: Tuple[int, ...]) -> Graph:
+    return _build_graph(nodes, flat_edges)
+
+
+def get_graph_flat(nodes: Sequence[int], flat_edges: Sequence[int]) -> Graph:
+    """
+    按 (顶点序列, 扁平边序列) 取图：同一关卡反复请求时直接复用已建好的 CSR。
+    缓存键与顺序有关（边编号、起点选择都依赖输入顺序），边数过多的图不缓存。
+    """
+    if len(flat_edges) // 2 > GRAPH_CACHE_MAX_EDGES:
+        return _build_graph(nodes, flat_edges)
+    return _cached_graph(tuple(nodes), tuple(flat_edges))
+
+
+def get_graph(nodes: Sequence[int], edges: Iterable[Sequence[int]]) -> Graph:
+    return get_graph_flat(nodes, [x for edge in edges for x in edge])
+
+
+def graph_cache_stats() -> Dict[str, float]:
+    info = _cached_graph.cache_info()
+    total = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_ratio": info.hits / total if total else 0.0,
+    }
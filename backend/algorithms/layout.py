@@ -0,0 +1,145 @@
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from algorithms.graph import get_graph
+from services.metrics import timed
+
+# 力导向迭代次数；顶点不超过 LAYOUT_RESTART_MAX_NODES 且边不超过 LAYOUT_RESTART_MAX_EDGES 时
+# 从 LAYOUT_RESTARTS 个初始布局出发，取边交叉最少的（数交叉是 O(E²) 的）
+LAYOUT_ITERATIONS = int(os.getenv("LAYOUT_ITERATIONS", "120"))
+LAYOUT_RESTARTS = int(os.getenv("LAYOUT_RESTARTS", "4"))
+LAYOUT_RESTART_MAX_NODES = int(os.getenv("LAYOUT_RESTART_MAX_NODES", "200"))
+LAYOUT_RESTART_MAX_EDGES = int(os.getenv("LAYOUT_RESTART_MAX_EDGES", "2000"))
+# 归一化坐标保留的小数位数，[0, 1] 区间内 4 位已经远小于一个像素
+LAYOUT_PRECISION = 4
+
+
+def _circle(V: int) -> np.ndarray:
+    # 与前端 layoutNodesCircle 相同：从正上方开始顺时针排成一圈
+    angle = np.arange(V) / max(V, 1) * 2 * np.pi - np.pi / 2
+    return np.stack([np.cos(angle), np.sin(angle)], axis=1) * 0.5
+
+
+def _force_directed(ends: np.ndarray, pos: np.ndarray, iterations: int) -> np.ndarray:
+    """
+    Fruchterman-Reingold 力导向布局，每轮迭代整体向量化（float32，V×V 缓冲区复用）：
+      斥力  每对顶点 k²/d，沿 (p_i - p_j) 方向，即权重 w_ij = k²/d_ij²；
+            Σ_j w_ij (x_i - x_j) = x_i Σ_j w_ij - (W x)_i，不必保留差值矩阵
+      引力  每条边 d²/k，用 bincount 累加到两端
+    位移按温度截断，温度线性降到 0。
+    """
+    V = len(pos)
+    k2 = np.float32(1.0 / V)
+    k = np.sqrt(k2)
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+    a, b = ends[:, 0], ends[:, 1]
+    x = pos[:, 0].astype(np.float32)
+    y = pos[:, 1].astype(np.float32)
+    weight = np.empty((V, V), dtype=np.float32)
+    scratch = np.empty((V, V), dtype=np.float32)
+    for _ in range(iterations):
+        np.subtract.outer(x, x, out=weight)
+        np.multiply(weight, weight, out=weight)
+        np.subtract.outer(y, y, out=scratch)
+        np.multiply(scratch, scratch, out=scratch)
+        weight += scratch
+        np.maximum(weight, 1e-6, out=weight)
+        np.divide(k2, weight, out=weight)
+        total = weight.sum(axis=1)
+        disp_x = x * total - weight @ x
+        disp_y = y * total - weight @ y
+
+        ex, ey = x[a] - x[b], y[a] - y[b]
+        pull = np.sqrt(ex * ex + ey * ey) / k
+        ex *= pull
+        ey *= pull
+        disp_x += np.bincount(b, ex, V) - np.bincount(a, ex, V)
+        disp_y += np.bincount(b, ey, V) - np.bincount(a, ey, V)
+
+        length = np.sqrt(disp_x * disp_x + disp_y * disp_y)
+        np.maximum(length, 1e-9, out=length)
+        scale = np.minimum(length, temperature) / length
+        x += (disp_x * scale).astype(np.float32)
+        y += (disp_y * scale).astype(np.float32)
+        temperature -= cooling
+    return np.stack([x, y], axis=1).astype(np.float64)
+
+
+def count_crossings(ends: np.ndarray, pos: np.ndarray, block_pairs: int = 1 << 20) -> int:
+    """
+    布局中真正相交的边对数（共享端点的边不算），O(E²) 向量化。
+    按行分块比较（每块约 block_pairs 对），内存随 E 线性增长而不是 E²。
+    """
+    E = len(ends)
+    if E < 2:
+        return 0
+    a, b = ends[:, 0], ends[:, 1]
+    px, py = pos[a, 0], pos[a, 1]
+    qx, qy = pos[b, 0], pos[b, 1]
+    dx, dy = qx - px, qy - py
+    rows = max(block_pairs // E, 1)
+    total = 0
+    for start in range(0, E - 1, rows):
+        i = slice(start, min(start + rows, E - 1))
+        j = slice(start + 1, E)
+        # 行是边 i，列是边 j；只数 j > i 的上三角
+        upper = np.arange(start + 1, E)[None, :] > np.arange(i.start, i.stop)[:, None]
+        ai, bi, aj, bj = a[i, None], b[i, None], a[None, j], b[None, j]
+        disjoint = (ai != aj) & (ai != bj) & (bi != aj) & (bi != bj)
+
+        def side(ux, uy, vx, vy, wx, wy):
+            # 点 w 在有向线段 u -> v（方向 v）的哪一侧
+            return np.sign(vx * (wy - uy) - vy * (wx - ux))
+
+        # 边 j 的两端分在边 i 两侧，且边 i 的两端分在边 j 两侧
+        straddle_i = side(px[i, None], py[i, None], dx[i, None], dy[i, None], px[None, j], py[None, j]) \
+            * side(px[i, None], py[i, None], dx[i, None], dy[i, None], qx[None, j], qy[None, j]) < 0
+        straddle_j = side(px[None, j], py[None, j], dx[None, j], dy[None, j], px[i, None], py[i, None]) \
+            * side(px[None, j], py[None, j], dx[None, j], dy[None, j], qx[i, None], qy[i, None]) < 0
+        total += int(np.count_nonzero(straddle_i & straddle_j & disjoint & upper))
+    return total
+
+
+def _normalize(pos: np.ndarray) -> np.ndarray:
+    """等比缩放并居中到 [0, 1] × [0, 1]，不改变长宽比。"""
+    low, high = pos.min(axis=0), pos.max(axis=0)
+    extent = float((high - low).max())
+    if extent <= 0:
+        return np.full_like(pos, 0.5)
+    return (pos - (low + high) / 2) / extent + 0.5
+
+
+@timed("layout")
+def compute_layout(nodes: Sequence[int], edges: Sequence[Tuple[int, int]], seed: Optional[int] = 0,
+                   iterations: int = LAYOUT_ITERATIONS) -> List[List[float]]:
+    """
+    计算关卡的顶点坐标，返回与 nodes 一一对应的归一化坐标 [[x, y], ...]（y 向下，与 canvas 一致）。
+    第一个初始布局是前端原来用的圆形，其余为随机位置（seed 固定，结果可复现）；
+    小图在几个结果中取边交叉最少的一个，1000 个顶点的图单次约 0.3 秒。
+    """
+    if not nodes:
+        return []
+    graph = get_graph(nodes, edges)
+    V = graph.vertex_count
+    ends = np.frombuffer(graph.ends, dtype=np.int32).astype(np.int64).reshape(-1, 2)
+    small = V <= LAYOUT_RESTART_MAX_NODES and graph.edge_count <= LAYOUT_RESTART_MAX_EDGES
+    restarts = LAYOUT_RESTARTS if small else 1
+    rng = np.random.default_rng(seed)
+    best, best_crossings = None, None
+    for attempt in range(max(restarts, 1)):
+        start = _circle(V) if attempt == 0 else rng.uniform(-0.5, 0.5, size=(V, 2))
+        pos = _force_directed(ends, start, iterations) if V > 1 else start
+        if restarts <= 1:
+            best = pos
+            break
+        crossings = count_crossings(ends, pos)
+        if best is None or crossings < best_crossings:
+            best, best_crossings = pos, crossings
+            if crossings == 0:
+                break
+    pos = np.round(_normalize(best), LAYOUT_PRECISION)
+    index = graph.index
+    return [pos[index[n]].tolist() for n in nodes]
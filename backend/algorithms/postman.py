@@ -0,0 +1,157 @@
+import os
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from algorithms.euler import euler_path_ids
+from algorithms.graph import Graph, get_graph
+from services.metrics import timed
+
+# 奇数点不超过这个数时在完全图上做精确匹配；更多时只给每个奇数点连最近的若干个奇数点
+POSTMAN_EXACT_MAX = int(os.getenv("POSTMAN_EXACT_MAX", "100"))
+POSTMAN_NEIGHBOURS = int(os.getenv("POSTMAN_NEIGHBOURS", "12"))
+
+
+def _bfs_distances(graph: Graph, source: int, targets: set, limit: Optional[int]) -> Dict[int, int]:
+    """从 source 做 BFS，返回到各目标顶点的距离；找到 limit 个目标后提前结束（None 表示找全）。"""
+    offsets, adj_nbr = graph.offsets, graph.adj_nbr
+    dist = {source: 0}
+    found: Dict[int, int] = {}
+    queue = deque([source])
+    while queue:
+        v = queue.popleft()
+        d = dist[v]
+        if v in targets and v != source:
+            found[v] = d
+            if limit is not None and len(found) >= limit:
+                break
+        for i in range(offsets[v], offsets[v + 1]):
+            u = adj_nbr[i]
+            if u not in dist:
+                dist[u] = d + 1
+                queue.append(u)
+    return found
+
+
+def _edges_connected(graph: Graph) -> bool:
+    """所有关联了边的顶点是否在同一个连通分量里。"""
+    offsets, adj_nbr = graph.offsets, graph.adj_nbr
+    start = graph.ends[0]
+    seen = bytearray(graph.vertex_count)
+    seen[start] = 1
+    stack = [start]
+    while stack:
+        v = stack.pop()
+        for i in range(offsets[v], offsets[v + 1]):
+            u = adj_nbr[i]
+            if not seen[u]:
+                seen[u] = 1
+                stack.append(u)
+    return all(seen[v] or offsets[v] == offsets[v + 1] for v in range(graph.vertex_count))
+
+
+def _bfs_path(graph: Graph, source: int, target: int) -> List[int]:
+    """source 到 target 的一条最短路径，返回沿途的边编号。"""
+    offsets, adj_edge, adj_nbr = graph.offsets, graph.adj_edge, graph.adj_nbr
+    parent = {source: (-1, -1)}
+    queue = deque([source])
+    while queue and target not in parent:
+        v = queue.popleft()
+        for i in range(offsets[v], offsets[v + 1]):
+            u = adj_nbr[i]
+            if u not in parent:
+                parent[u] = (v, adj_edge[i])
+                queue.append(u)
+    edges = []
+    v = target
+    while v != source:
+        v, eid = parent[v]
+        edges.append(eid)
+    return edges
+
+
+def _min_weight_pairing(odd: List[int], costs: Dict[Tuple[int, int], int],
+                        open_route: bool) -> Optional[List[Tuple[int, int]]]:
+    """
+    奇数点之间的最小权完美匹配（带花树算法，networkx 实现，按需导入）。
+    开放路线时额外加两个虚拟点，它们与每个奇数点之间的代价为 0，
+    于是匹配会自动挑出最合适的两个奇数点作为路线的起点和终点。
+    候选边不足以形成完美匹配时返回 None。
+    """
+    import networkx as nx
+
+    top = max(costs.values(), default=0) + 1
+    G = nx.Graph()
+    G.add_nodes_from(odd)
+    for (a, b), cost in costs.items():
+        # 最大权匹配：代价越小权重越大；maxcardinality 保证是完美匹配
+        G.add_edge(a, b, weight=top - cost)
+    if open_route:
+        for dummy in (-1, -2):
+            for v in odd:
+                G.add_edge(dummy, v, weight=top)
+    matching = nx.max_weight_matching(G, maxcardinality=True)
+    if 2 * len(matching) != G.number_of_nodes():
+        return None
+    return [(a, b) for a, b in matching if a >= 0 and b >= 0]
+
+
+def _retrace_pairs(graph: Graph, odd: List[int], open_route: bool) -> List[Tuple[int, int]]:
+    """求出需要配对（并重走最短路径）的奇数点对。"""
+    targets = set(odd)
+    exact = len(odd) <= POSTMAN_EXACT_MAX
+    neighbours = None if exact else POSTMAN_NEIGHBOURS
+    while True:
+        costs: Dict[Tuple[int, int], int] = {}
+        for a in odd:
+            for b, d in _bfs_distances(graph, a, targets, neighbours).items():
+                costs[(a, b) if a < b else (b, a)] = d
+        pairs = _min_weight_pairing(odd, costs, open_route)
+        if pairs is not None:
+            return pairs
+        # 只连近邻时可能凑不出完美匹配，扩大近邻数重试
+        neighbours = None if neighbours is None or neighbours * 2 >= len(odd) else neighbours * 2
+
+
+@timed("postman")
+def chinese_postman(nodes: Sequence[int], edges: Sequence[Tuple[int, int]],
+                    closed: bool = False) -> Optional[Dict]:
+    """
+    中国邮递员问题（每条边长度为 1）：奇数点超过 2 个时，找出需要重走的最少的边，
+    使得一条路线能覆盖所有边。
+      1. 对每个奇数点做 BFS，得到奇数点两两之间的最短距离；
+      2. 在奇数点上求最小权完美匹配（开放路线可留下两个奇数点作为起终点）；
+      3. 把每对奇数点之间最短路径上的边复制一份，图变成欧拉图，再用 Hierholzer 求路线。
+    奇数点很多时只在近邻之间匹配（见 POSTMAN_EXACT_MAX / POSTMAN_NEIGHBOURS），结果不一定严格最优。
+
+    Args:
+        closed (bool): True 要求回到起点（回路），False 允许起终点不同（通常更短）。
+
+    Returns:
+        {"path": 顶点序列, "retraced": [[u, v], ...] 需要重走的边, "closed": bool}；
+        边不连通（无法用一条路线走完）时返回 None。
+    """
+    graph = get_graph(nodes, edges)
+    if graph.edge_count == 0:
+        return {"path": [], "retraced": [], "closed": closed}
+    if not _edges_connected(graph):
+        return None
+    degree = graph.degrees()
+    odd = [v for v, d in enumerate(degree) if d % 2 == 1]
+    open_route = not closed
+    retraced: List[int] = []
+    if len(odd) > (2 if open_route else 0):
+        for a, b in _retrace_pairs(graph, odd, open_route):
+            retraced.extend(_bfs_path(graph, a, b))
+
+    labels, ends = graph.labels, graph.ends
+    flat = [labels[x] for x in ends]
+    for eid in retraced:
+        flat.append(labels[ends[2 * eid]])
+        flat.append(labels[ends[2 * eid + 1]])
+    augmented = Graph(labels[:graph.node_count], flat)
+    path = euler_path_ids(augmented)
+    return {
+        "path": [augmented.labels[v] for v in path],
+        "retraced": [[labels[ends[2 * eid]], labels[ends[2 * eid + 1]]] for eid in retraced],
+        "closed": closed,
+    }
@@ -0,0 +1,78 @@
+from typing import Any, Dict, Iterable, Optional
+
+from algorithms.graph import Graph
+
+# 校验失败的原因代码 -> 提示文字
+VERIFY_REASONS = {
+    "unknown_vertex": "顶点不在图中",
+    "no_edge": "两点之间没有边",
+    "edge_used": "这条边已经走过了",
+    "incomplete": "还有边没有走完",
+}
+
+
+class PathVerifier:
+    """
+    校验玩家提交的完整顶点序列是否是这张图的一笔画解，一遍扫描 O(L)。
+    按顶点对维护剩余边数（重复边计数），每走一步减一；可以分多次 feed，
+    因此流式请求体可以边收边验，遇到第一个错误就停下。
+    """
+
+    __slots__ = ("graph", "remaining", "steps", "prev", "error")
+
+    def __init__(self, graph: Graph):
+        self.graph = graph
+        self.remaining = {key: len(eids) for key, eids in graph.pairs.items()}
+        self.steps = 0
+        self.prev: Optional[int] = None  # 上一个顶点的稠密编号
+        self.error: Optional[Dict[str, Any]] = None
+
+    def _fail(self, reason: str, frm: Optional[int], to: int) -> bool:
+        self.error = {"index": self.steps, "from": frm, "to": to, "reason": reason}
+        return False
+
+    def feed(self, vertices: Iterable[int]) -> bool:
+        """继续校验一段顶点序列；出错后返回 False，之后的输入都会被忽略。"""
+        if self.error is not None:
+            return False
+        index, labels, remaining = self.graph.index, self.graph.labels, self.remaining
+        size = len(labels)
+        prev = self.prev
+        steps = self.steps
+        for label in vertices:
+            v = index.get(label)
+            if prev is None:
+                if v is None:
+                    return self._fail("unknown_vertex", None, label)
+                prev = v
+                continue
+            frm = labels[prev]
+            if v is None:
+                self.steps = steps
+                return self._fail("unknown_vertex", frm, label)
+            key = prev * size + v if prev <= v else v * size + prev
+            count = remaining.get(key)
+            if not count:
+                self.steps = steps
+                return self._fail("edge_used" if count == 0 else "no_edge", frm, label)
+            remaining[key] = count - 1
+            steps += 1
+            prev = v
+        self.prev = prev
+        self.steps = steps
+        return True
+
+    def result(self) -> Dict[str, Any]:
+        """{"ok", "valid", "steps", "remaining", "invalidStep", "message"}，invalidStep 是第一个出错的步骤。"""
+        error = self.error
+        left = self.graph.edge_count - self.steps
+        if error is None and left:
+            error = {"index": self.steps, "from": None, "to": None, "reason": "incomplete"}
+        return {
+            "ok": True,
+            "valid": error is None,
+            "steps": self.steps,
+            "remaining": left,
+            "invalidStep": error,
+            "message": "路径有效" if error is None else VERIFY_REASONS[error["reason"]],
+        }
@@ -0,0 +1,81 @@
+"""
+基准测试用的图族。每个生成函数按目标边数给出一张连通的欧拉图（奇度点两两补一条重复边），
+顶点为 1..n、边为 (u, v) 元组列表，与关卡数据格式一致；同样的参数与种子总是得到同一张图。
+"""
+import math
+import random
+from typing import Callable, Dict, List, Tuple
+
+Edge = Tuple[int, int]
+GraphData = Tuple[List[int], List[Edge]]
+
+
+def _eulerize(n: int, edges: List[Edge]) -> List[Edge]:
+    """把奇度点按编号顺序两两配对，各补一条边（可能与已有边重复），使所有顶点度数为偶数。"""
+    degree = [0] * (n + 1)
+    for u, v in edges:
+        degree[u] += 1
+        degree[v] += 1
+    odd = [v for v in range(1, n + 1) if degree[v] % 2 == 1]
+    edges.extend(zip(odd[0::2], odd[1::2]))
+    return edges
+
+
+def cycle(target: int, rng: random.Random) -> GraphData:
+    """一个大环，n 个顶点 n 条边。"""
+    n = max(target, 3)
+    return list(range(1, n + 1)), [(v, v % n + 1) for v in range(1, n + 1)]
+
+
+def complete(target: int, rng: random.Random) -> GraphData:
+    """完全图 K_n，n 取奇数（度数 n-1 为偶数，本身就是欧拉图），边数最接近 target。"""
+    n = max(3, int((1 + math.sqrt(1 + 8 * target)) / 2))
+    if n % 2 == 0:
+        n += 1
+    nodes = list(range(1, n + 1))
+    return nodes, [(u, v) for u in nodes for v in range(u + 1, n + 1)]
+
+
+def wheel(target: int, rng: random.Random) -> GraphData:
+    """轮图：中心顶点 1 连向一圈外环，外环顶点度数为 3，补边后外环相邻点之间出现重复边。"""
+    rim = max(target // 2, 3)
+    n = rim + 1
+    edges = [(1, v) for v in range(2, n + 1)]
+    edges += [(v, v + 1) for v in range(2, n)] + [(n, 2)]
+    return list(range(1, n + 1)), _eulerize(n, edges)
+
+
+def random_gnp(target: int, rng: random.Random) -> GraphData:
+    """G(n, p) 随机图，平均度数约为 8；先串一条哈密顿路径保证连通。"""
+    from generate_graph import _sample_pairs
+
+    n = max(target // 5, 4)
+    p = min(1.0, 8 / n)
+    edges = [(v, v + 1) for v in range(1, n)]
+    edges += [(w + 1, v + 1) for w, v in _sample_pairs(n, p, rng) if v != w + 1]
+    return list(range(1, n + 1)), _eulerize(n, edges)
+
+
+def hub_multigraph(target: int, rng: random.Random) -> GraphData:
+    """少数几个枢纽顶点承担绝大多数边：每个叶子向随机枢纽连 2~4 条边，枢纽之间大量重复边。"""
+    hubs = max(2, int(math.sqrt(target) / 10))
+    leaves = max(target // 3, 2)
+    n = hubs + leaves
+    edges = [(h, h % hubs + 1) for h in range(1, hubs + 1)]
+    for leaf in range(hubs + 1, n + 1):
+        for _ in range(rng.randint(2, 4)):
+            edges.append((rng.randint(1, hubs), leaf))
+    return list(range(1, n + 1)), _eulerize(n, edges)
+
+
+FAMILIES: Dict[str, Callable[[int, random.Random], GraphData]] = {
+    "cycle": cycle,
+    "complete": complete,
+    "wheel": wheel,
+    "gnp": random_gnp,
+    "hub": hub_multigraph,
+}
+
+
+def make_graph(family: str, target: int, seed: int = 0) -> GraphData:
+    return FAMILIES[family](target, random.Random(seed))
@@ -0,0 +1,180 @@
+"""
+算法微基准：在不同图族、不同规模（10 ~ 10^6 条边）上测 find_euler_path、find_next_step
+与 generate_eulerian_graph_data 的耗时和峰值内存，并与保存的基线比较。
+
+    python -m benchmarks.run --save                   # 跑一遍并写入基线
+    python -m benchmarks.run                          # 与基线比较，有退化时退出码为 1
+    python -m benchmarks.run --max-edges 1000000      # 包含 10^6 条边的规模
+    python -m benchmarks.run --only hint --families gnp,hub --threshold 0.1
+
+需在 backend 目录下运行。基线与机器有关，应在同一台机器上生成和比较。
+耗时取多次运行的最小值；峰值内存在 tracemalloc 下单独再跑一次得到，不影响计时。
+提示算法按欧拉路径的前 10% / 50% / 90% 条边回放出局面（visitedEdges 字符串 + 当前端点），
+与前端真实请求的形状一致。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from algorithms.euler import find_euler_path, find_next_step
+from algorithms.graph import _cached_graph
+from benchmarks.families import FAMILIES, make_graph
+from generate_graph import generate_eulerian_graph_data
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000]
+HINT_PROGRESS = (0.1, 0.5, 0.9)
+BENCHMARKS = ("euler", "hint", "generate")
+
+Case = Tuple[str, int, Callable[[], Any]]  # (名称, 边数, 被测调用)
+
+
+def _replay(nodes: List[int], edges: List[Tuple[int, int]], path: List[int],
+            progress: float) -> Callable[[], Any]:
+    """沿欧拉路径走到 progress 处，返回在该局面下请求提示的调用。"""
+    k = int(len(edges) * progress)
+    visited = [f"{a}-{b}" for a, b in zip(path[:k], path[1:k + 1])]
+    endpoint = path[k]
+    return lambda: find_next_step(nodes, edges, visited, endpoint)
+
+
+def _generate_call(target: int) -> Callable[[], Any]:
+    # 平均度数约为 10：n 个顶点的回路 + 期望 0.75 * p * n(n-3)/2 条弦
+    n = max(target // 5, 4)
+    p = min(1.0, max(target - n, 0) / (0.75 * n * (n - 3) / 2))
+    return lambda: generate_eulerian_graph_data(num_nodes=n, edge_prob=p, type="path", rng=random.Random(0))
+
+
+def iter_cases(benchmarks: List[str], families: List[str], sizes: List[int]) -> Iterator[Case]:
+    for size in sizes:
+        if "generate" in benchmarks:
+            yield f"generate/{size}", size, _generate_call(size)
+        for family in families:
+            if "euler" not in benchmarks and "hint" not in benchmarks:
+                break
+            nodes, edges = make_graph(family, size)
+            if "euler" in benchmarks:
+                yield f"euler/{family}/{size}", len(edges), lambda n=nodes, e=edges: find_euler_path(n, e)
+            if "hint" in benchmarks:
+                _cached_graph.cache_clear()
+                path = find_euler_path(nodes, edges)
+                for progress in HINT_PROGRESS:
+                    name = f"hint{int(progress * 100)}/{family}/{size}"
+                    yield name, len(edges), _replay(nodes, edges, path, progress)
+
+
+def measure(call: Callable[[], Any], repeat: int, budget: float, memory: bool) -> Dict[str, Any]:
+    """
+    重复调用直到满 repeat 次或累计超过 budget 秒（至少一次），每次调用前清空图缓存，
+    测的是冷启动（建 CSR + 求解）的真实开销。
+    """
+    times = []
+    while len(times) < repeat and (not times or sum(times) < budget):
+        _cached_graph.cache_clear()
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    result = {"seconds": min(times), "median": statistics.median(times), "runs": len(times)}
+    if memory:
+        _cached_graph.cache_clear()
+        tracemalloc.start()
+        try:
+            call()
+            result["peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float,
+            memory_threshold: float, min_seconds: float) -> List[str]:
+    """返回超出阈值的退化项说明；两边都低于 min_seconds 的耗时视为噪声，不参与比较。"""
+    regressions = []
+    for name, current in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if max(old["seconds"], current["seconds"]) >= min_seconds \
+                and current["seconds"] > old["seconds"] * (1 + threshold):
+            regressions.append(f"{name}: 耗时 {old['seconds'] * 1000:.2f}ms -> {current['seconds'] * 1000:.2f}ms")
+        if "peak_kb" in old and "peak_kb" in current and current["peak_kb"] > 64 \
+                and current["peak_kb"] > old["peak_kb"] * (1 + memory_threshold):
+            regressions.append(f"{name}: 峰值内存 {old['peak_kb']}KB -> {current['peak_kb']}KB")
+    return regressions
+
+
+def _format_row(name: str, edges: int, result: Dict[str, Any], old: Optional[Dict[str, Any]]) -> str:
+    change = ""
+    if old:
+        change = f"{(result['seconds'] / old['seconds'] - 1) * 100:+7.1f}%" if old["seconds"] else ""
+    peak = f"{result['peak_kb']:>10}KB" if "peak_kb" in result else ""
+    return f"{name:<28}{edges:>9} {result['seconds'] * 1000:>11.3f}ms {result['median'] * 1000:>11.3f}ms{peak} {change}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="一笔画算法微基准")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="要跑的基准，逗号分隔：euler,hint,generate")
+    parser.add_argument("--families", default=",".join(FAMILIES), help="图族，逗号分隔：" + ",".join(FAMILIES))
+    parser.add_argument("--max-edges", type=int, default=100_000, help="最大规模（边数），最多 10^6")
+    parser.add_argument("--repeat", type=int, default=5, help="每项最多重复次数")
+    parser.add_argument("--budget", type=float, default=1.0, help="每项累计计时超过这么多秒就不再重复")
+    parser.add_argument("--no-memory", action="store_true", help="不测峰值内存（tracemalloc 会让大图慢几倍）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线 JSON 路径")
+    parser.add_argument("--save", action="store_true", help="把本次结果写为新的基线")
+    parser.add_argument("--threshold", type=float, default=0.25, help="耗时退化阈值（0.25 = 慢 25%%）")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="峰值内存退化阈值")
+    parser.add_argument("--min-seconds", type=float, default=0.001, help="低于这个耗时的项不参与耗时比较")
+    args = parser.parse_args(argv)
+
+    benchmarks = [b for b in args.only.split(",") if b]
+    families = [f for f in args.families.split(",") if f]
+    unknown = [b for b in benchmarks if b not in BENCHMARKS] + [f for f in families if f not in FAMILIES]
+    if unknown:
+        parser.error(f"未知的基准或图族: {', '.join(unknown)}")
+    sizes = [s for s in SIZES if s <= args.max_edges]
+
+    baseline: Dict[str, Dict] = {}
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    peak = "" if args.no_memory else f"{'peak':>12}"
+    print(f"{'benchmark':<28}{'edges':>9} {'min':>13} {'median':>13}{peak}")
+    results: Dict[str, Dict] = {}
+    for name, edges, call in iter_cases(benchmarks, families, sizes):
+        result = measure(call, args.repeat, args.budget, not args.no_memory)
+        result["edges"] = edges
+        results[name] = result
+        print(_format_row(name, edges, result, baseline.get(name)), flush=True)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        meta = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"基线已写入 {args.baseline}")
+        return 0
+    if not baseline:
+        print("没有基线，跳过比较（先用 --save 生成）")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, args.memory_threshold, args.min_seconds)
+    for line in regressions:
+        print("退化:", line)
+    print(f"共 {len(results)} 项，{len(regressions)} 项退化（阈值 耗时 {args.threshold:.0%} / 内存 {args.memory_threshold:.0%}）")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
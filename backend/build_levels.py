@@ -0,0 +1,165 @@
+"""
+离线关卡包构建工具：多进程批量生成、校验、去重关卡，写出版本化的关卡包。
+
+    python build_levels.py --count 1000 --output data/levels.pack.json.gz
+    python build_levels.py --difficulty hard --count 5000 --workers 8
+    python build_levels.py --count 1000 --rebucket   # 按实测难度重新分档
+    python build_levels.py --count 1000 --layout     # 同时写入每关的顶点坐标
+
+后端启动时通过环境变量 LEVEL_PACK 加载关卡包，/level 直接按编号查表。
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from algorithms.difficulty import DIFFICULTY_BUCKETS, score_level
+from algorithms.euler import find_euler_path
+from algorithms.fingerprint import graph_fingerprint
+from algorithms.layout import compute_layout
+from generate_graph import DIFFICULTY_SETTINGS, LEVEL_VERSION, generate_level
+from services.level_pack import write_pack
+
+
+def build_one(task: Tuple[str, int, int, bool]) -> Optional[Tuple[int, str, Dict]]:
+    """
+    生成并校验一个关卡（在子进程中运行），walkers > 0 时顺带做蒙特卡洛难度评分，
+    layout 为真时顺带计算顶点坐标。
+    返回 (种子, 指纹, 关卡)；生成失败或不可一笔画时返回 None。
+    """
+    difficulty, seed, walkers, layout = task
+    try:
+        level = generate_level(difficulty, seed)
+    except Exception:
+        return None
+    path = find_euler_path(level["nodes"], level["edges"])
+    if path is None or len(path) != len(level["edges"]) + 1:
+        return None
+    level = {
+        "nodes": list(level["nodes"]),
+        "edges": [list(e) for e in level["edges"]],
+        "seed": seed,
+    }
+    if walkers > 0:
+        report = score_level(level["nodes"], level["edges"], walkers=walkers, seed=seed)
+        level["rating"] = {
+            "bucket": report["bucket"],
+            "dead_end_probability": round(report["dead_end_probability"], 4),
+            "expected_resets": None if report["expected_resets"] is None else round(report["expected_resets"], 4),
+            "trap_edges": [item["edge"] for item in report["trap_edges"]],
+        }
+    if layout:
+        level["layout"] = compute_layout(level["nodes"], level["edges"], seed=seed)
+    return seed, graph_fingerprint(level["nodes"], level["edges"]), level
+
+
+def build_difficulty(executor: ProcessPoolExecutor, difficulty: str, count: int,
+                     start_seed: int, max_seeds: int, chunksize: int,
+                     walkers: int = 0, layout: bool = False) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    按种子顺序分批生成，直到收集到 count 个互不相同的关卡或种子用完。
+    结果按种子顺序排列，与进程数无关，相同参数总是得到相同的关卡包。
+    """
+    levels: List[Dict] = []
+    seen = set()
+    stats = {"generated": 0, "invalid": 0, "duplicates": 0}
+    seed = start_seed
+    end_seed = start_seed + max_seeds
+    while len(levels) < count and seed < end_seed:
+        # 每批多要一些，抵消重复与失败
+        batch = min(end_seed - seed, max(count - len(levels), 1) * 2)
+        tasks = [(difficulty, s, walkers, layout) for s in range(seed, seed + batch)]
+        seed += batch
+        for result in executor.map(build_one, tasks, chunksize=chunksize):
+            stats["generated"] += 1
+            if result is None:
+                stats["invalid"] += 1
+                continue
+            _, fingerprint, level = result
+            if fingerprint in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(fingerprint)
+            if len(levels) < count:
+                levels.append(level)
+    return levels, stats
+
+
+def rebucket(packed: Dict[str, List[Dict]], count: int) -> Dict[str, List[Dict]]:
+    """
+    按实测难度（rating.bucket）重新分档：把各难度生成的关卡合在一起，
+    依次放进对应档位，每档最多 count 个，跨难度的重复关卡只保留一个。
+    原来的难度记在 source 字段里。
+    """
+    buckets: Dict[str, List[Dict]] = {name: [] for name, _ in DIFFICULTY_BUCKETS}
+    seen = set()
+    for difficulty, levels in packed.items():
+        for level in levels:
+            fingerprint = graph_fingerprint(level["nodes"], level["edges"])
+            bucket = buckets[level["rating"]["bucket"]]
+            if fingerprint in seen or len(bucket) >= count:
+                continue
+            seen.add(fingerprint)
+            bucket.append(dict(level, source=difficulty))
+    return buckets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线批量生成一笔画关卡包")
+    parser.add_argument("--difficulty", action="append", choices=sorted(DIFFICULTY_SETTINGS),
+                        help="要生成的难度，可重复指定；默认全部难度")
+    parser.add_argument("--count", type=int, default=1000, help="每个难度的关卡数")
+    parser.add_argument("--start-seed", type=int, default=1, help="起始种子（即关卡编号）")
+    parser.add_argument("--max-seeds", type=int, default=None,
+                        help="每个难度最多尝试的种子数，默认 count 的 20 倍")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="进程数，默认 CPU 核数")
+    parser.add_argument("--chunksize", type=int, default=64, help="每次派给子进程的任务数")
+    parser.add_argument("--score", action="store_true",
+                        help="对每个关卡做蒙特卡洛难度评分，结果写入 rating 字段")
+    parser.add_argument("--rebucket", action="store_true",
+                        help="按实测难度重新分档（隐含 --score）")
+    parser.add_argument("--walkers", type=int, default=1024, help="评分时每个关卡模拟的玩家数")
+    parser.add_argument("--layout", action="store_true", help="计算每个关卡的顶点坐标，写入 layout 字段")
+    parser.add_argument("--output", default=os.path.join("data", "levels.pack.json.gz"), help="输出文件")
+    args = parser.parse_args(argv)
+
+    difficulties = args.difficulty or list(DIFFICULTY_SETTINGS)
+    max_seeds = args.max_seeds or args.count * 20
+    walkers = args.walkers if (args.score or args.rebucket) else 0
+    packed = {}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for difficulty in difficulties:
+            t0 = time.perf_counter()
+            levels, stats = build_difficulty(
+                executor, difficulty, args.count, args.start_seed, max_seeds, args.chunksize, walkers, args.layout
+            )
+            packed[difficulty] = levels
+            print(
+                f"{difficulty}: {len(levels)} levels "
+                f"(generated {stats['generated']}, invalid {stats['invalid']}, "
+                f"duplicates {stats['duplicates']}) in {time.perf_counter() - t0:.2f}s"
+            )
+            if len(levels) < args.count:
+                print(f"警告：{difficulty} 只得到 {len(levels)} 个不重复关卡，可调大 --max-seeds")
+
+    if args.rebucket:
+        packed = rebucket(packed, args.count)
+        print("按实测难度分档: " + ", ".join(f"{name} {len(levels)}" for name, levels in packed.items()))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    write_pack(args.output, packed, meta={
+        "generator": LEVEL_VERSION,
+        "start_seed": args.start_seed,
+        "count": args.count,
+        "walkers": walkers,
+        "layout": args.layout,
+        "rebucketed": args.rebucket,
+    })
+    size = os.path.getsize(args.output)
+    print(f"Wrote {args.output} ({size / 1024:.1f} KiB) in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
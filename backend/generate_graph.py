@@ -1,95 +1,251 @@
-import networkx as nx
+import heapq
+import math
 import random
 
-def generate_eulerian_graph_data(num_nodes=6, edge_prob=0.4, type="path"):
+from services.metrics import timed
+
+
+def _sample_pairs(n, p, rng):
+    """
+    以概率 p 独立抽取 {0..n-1} 中的无序点对 (w, v)，w < v。
+    几何跳跃采样：直接跳到下一条被选中的点对，耗时 O(n + 抽中的对数)，而不是 O(n^2)。
+    """
+    if p <= 0:
+        return
+    if p >= 1:
+        for v in range(1, n):
+            for w in range(v):
+                yield w, v
+        return
+    lp = math.log(1.0 - p)
+    v, w = 1, -1
+    while v < n:
+        w += 1 + int(math.log(1.0 - rng.random()) / lp)
+        while w >= v and v < n:
+            w -= v
+            v += 1
+        if v < n:
+            yield w, v
+
+
+def _random_tree(n, rng):
+    """
+    {1..n} 上均匀随机的生成树（随机 Prüfer 序列解码，O(n log n)），返回 (边列表, 邻接集合)。
+    解出的树恰好是星形时，把一个叶子改挂到另一个叶子上：星形树的补图不连通，
+    中心点无法再加弦，奇偶修正可能无解。n >= 4 时改挂后一定不是星形。
+    """
+    adjacency = [set() for _ in range(n + 1)]
+    if n == 2:
+        edges = [(1, 2)]
+    else:
+        prufer = [rng.randint(1, n) for _ in range(n - 2)]
+        remaining = [1] * (n + 1)  # 每个点还要在序列里出现的次数 + 1
+        for v in prufer:
+            remaining[v] += 1
+        leaves = [v for v in range(1, n + 1) if remaining[v] == 1]
+        heapq.heapify(leaves)
+        edges = []
+        for v in prufer:
+            leaf = heapq.heappop(leaves)
+            edges.append((leaf, v))
+            remaining[v] -= 1
+            if remaining[v] == 1:
+                heapq.heappush(leaves, v)
+        edges.append((heapq.heappop(leaves), heapq.heappop(leaves)))
+    for a, b in edges:
+        adjacency[a].add(b)
+        adjacency[b].add(a)
+    center = max(range(1, n + 1), key=lambda v: len(adjacency[v]))
+    if n >= 4 and len(adjacency[center]) == n - 1:
+        leaf, other = rng.sample(sorted(adjacency[center]), 2)
+        adjacency[center].discard(leaf)
+        adjacency[leaf] = {other}
+        adjacency[other].add(leaf)
+        edges = [(a, b) for a, b in edges if leaf not in (a, b)] + [(other, leaf)]
+    return edges, adjacency
+
+
+def generate_eulerian_graph_data(num_nodes=6, edge_prob=0.4, type="path", rng=None):
     """
     自动生成一个具有欧拉路径/回路的图数据（具有更高的随机性）。
 
+    构造法，一次生成、无需重试，不依赖 networkx：
+      1) 先搭一个保证连通的骨架，二选一（n >= 4 时各占一半）：
+         - 按随机顺序把所有顶点连成一个哈密顿回路，每个点度数为 2；
+         - 均匀随机的生成树（不是星形），得到没有哈密顿回路的形状（树状、带悬挂链等）；
+      2) 在骨架之外随机撒一些 "弦"；
+      3) 只通过增删弦来修正奇度点（骨架始终完整，连通性不受影响）；
+      4) 需要路径图时，回路骨架删掉一条回路边（变成哈密顿路径），树骨架删掉一条弦，恰好留下 2 个奇度点。
+    生成的是简单图（无重复边、无自环），可用于远超 4~9 个顶点的大关卡。
+
     Args:
         num_nodes (int): 图中顶点的数量 (默认为 6)。
-        edge_prob (float): 随机图生成中边的存在概率 (0.0 到 1.0)。控制图的稠密程度。
+        edge_prob (float): 稠密程度 (0.0 到 1.0)，越大弦越多；除骨架的 n - 1 ~ n 条边外，期望弦数约为 0.75 * edge_prob * n(n-3)/2。
         type (str): 'circuit' 表示生成欧拉回路图 (0个奇度顶点)；
                     'path' 表示生成欧拉路径图 (2个奇度顶点)。
+        rng (random.Random): 随机数发生器，所有随机性都从它取；为 None 时新建一个。
+                    不使用模块级全局随机状态，并发生成互不干扰。
 
     Returns:
         dict: 包含 'nodes' 和 'edges' 键的图数据字典。
     """
     if num_nodes < 3:
         raise ValueError("顶点数必须至少为 3 才能生成有意义的连通图。")
-    
-    # --- 1. 随机图生成（引入随机结构） ---
-    # 使用 G(n, p) 模型生成一个随机图
-    G = nx.gnp_random_graph(num_nodes, edge_prob)
-    # 节点编号从 0 到 num_nodes-1，为了匹配您的格式，我们进行重新编号
-    mapping = {i: i + 1 for i in G.nodes()}
-    G = nx.relabel_nodes(G, mapping)
-    nodes = list(G.nodes())
-
-    # --- 2. 强制连通性 ---
-    if not nx.is_connected(G):
-        # 找到所有不连通的子图
-        components = list(nx.connected_components(G))
-        # 随机连接相邻的两个子图，直到图连通
-        for i in range(len(components) - 1):
-            # 从第 i 个子图和第 i+1 个子图中随机选择一个顶点连接
-            u = random.choice(list(components[i]))
-            v = random.choice(list(components[i+1]))
-            # 确保添加一条新边，避免重复
-            if not G.has_edge(u, v):
-                G.add_edge(u, v)
+    if rng is None:
+        rng = random.Random()
+    if num_nodes >= 4 and rng.random() < 0.5:
+        return _tree_backbone_graph(num_nodes, edge_prob, type, rng)
+    return _cycle_backbone_graph(num_nodes, edge_prob, type, rng)
+
+
+def _toggle(chords, u, v):
+    key = (u, v) if u < v else (v, u)
+    if key in chords:
+        chords.remove(key)
+    else:
+        chords.add(key)
+
+
+def _cycle_backbone_graph(n, edge_prob, type, rng):
+    # --- 1. 随机哈密顿回路（保证连通） ---
+    order = list(range(1, n + 1))
+    rng.shuffle(order)
+    pos = [0] * (n + 1)  # pos[v] = v 在回路中的位置
+    for i, v in enumerate(order):
+        pos[v] = i
+
+    def on_cycle(u, v):
+        d = abs(pos[u] - pos[v])
+        return d == 1 or d == n - 1
+
+    # --- 2. 随机弦（不与回路边重合） ---
+    # 回路已经占了一部分边，弦按 0.75 * edge_prob 抽取，
+    # 使各难度的期望边数与原先 "G(n,p) + 修正" 的生成结果接近
+    chords = set()
+    for w, v in _sample_pairs(n, 0.75 * edge_prob, rng):
+        a, b = order[w], order[v]
+        if not on_cycle(a, b):
+            chords.add((a, b) if a < b else (b, a))
 
     # --- 3. 欧拉图修正（确保 0 个奇度顶点） ---
-    
-    # 找出所有奇度顶点
-    odd_degree_nodes = [node for node, degree in G.degree() if degree % 2 != 0]
-
-    # 随机打乱奇度顶点列表，增强配对的随机性
-    random.shuffle(odd_degree_nodes) 
-    
-    # 成对地连接奇度顶点，使它们的度数变为偶数
-    for i in range(0, len(odd_degree_nodes) - 1, 2):
-        u = odd_degree_nodes[i]
-        v = odd_degree_nodes[i+1]
-        
-        # 只有当边不存在时才添加，避免多重边
-        if not G.has_edge(u, v):
-            G.add_edge(u, v)
+    chord_degree = [0] * (n + 1)
+    for a, b in chords:
+        chord_degree[a] += 1
+        chord_degree[b] += 1
+    # 奇度点按回路位置排序，与 "对面" 的奇度点配对，尽量避开回路上相邻的点
+    odd_degree_nodes = sorted((v for v in order if chord_degree[v] % 2), key=pos.__getitem__)
+    half = len(odd_degree_nodes) // 2
+    for u, v in zip(odd_degree_nodes[:half], odd_degree_nodes[half:]):
+        if not on_cycle(u, v):
+            # 翻转弦 (u, v)：u、v 的奇偶性同时改变
+            _toggle(chords, u, v)
         else:
-            # 如果 u 和 v 已经相连，我们需要找到一个不同的顶点 w 来修正
-            # 例如：找到一个与 u 不相连的点 w，添加 (u, w) 和 (v, w)
-            # 或者，将奇度点 u 和 v 之一与另一个奇度点配对。
-            # 为了简化并保持偶数修正，如果边已存在，我们跳过这对，
-            # 并期望下一次生成能有更合适的配对。
-            # 这是一个可接受的妥协，因为奇度顶点的数量总是偶数。
-            # 更严格的修正方法会复杂得多。
-            pass
+            # u、v 在回路上相邻，不能动回路边：借一个与两者都不相邻的点 w，
+            # 翻转 (u, w) 和 (w, v)，w 的度数变化为偶数。n >= 5 时 w 一定存在
+            # （n <= 4 时弦的端点两两相对，不会走到这里）
+            a, b = (u, v) if (pos[u] + 1) % n == pos[v] else (v, u)
+            w = order[(pos[b] + 2 + rng.randrange(n - 4)) % n]
+            _toggle(chords, a, w)
+            _toggle(chords, w, b)
+
+    cycle_edges = [(order[i], order[(i + 1) % n]) for i in range(n)]
 
     # --- 4. 路径调整（如果需要欧拉路径） ---
-    
     if type == "path":
-        # 此时图 G 具有欧拉回路（0个奇度顶点）
-        if G.number_of_edges() > 0:
-            # 随机选择并移除一条边，制造 2 个奇度顶点
-            edge_to_remove = random.choice(list(G.edges()))
-            G.remove_edge(*edge_to_remove)
-    
-    # --- 5. 最终检查与格式化 ---
-
-    # 再次检查连通性，如果移除边导致不连通，重新生成
-    if not nx.is_connected(G):
-        print("警告：随机图生成后不连通，正在重新生成...")
-        return generate_random_eulerian_graph_data(num_nodes, edge_prob, type)
-
-    # 验证最终的奇度顶点数量
-    final_odd_nodes = [node for node, degree in G.degree() if degree % 2 != 0]
-    
-    if type == "path" and len(final_odd_nodes) != 2:
-        # 如果移除操作或其他原因没有成功生成恰好 2 个奇度点，则重新尝试
-        print(f"警告：欧拉路径图未生成恰好 2 个奇度点 ({len(final_odd_nodes)} 个)，正在重新生成...")
-        return generate_random_eulerian_graph_data(num_nodes, edge_prob, type)
-    
+        # 删掉一条回路边：剩下的哈密顿路径仍然连通，两端变成奇度点
+        cycle_edges.pop(rng.randrange(n))
+
+    return _format(n, cycle_edges, chords)
+
+
+def _tree_backbone_graph(n, edge_prob, type, rng):
+    # --- 1. 随机生成树（保证连通，不是星形） ---
+    tree_edges, adjacency = _random_tree(n, rng)
+
+    # --- 2. 随机弦（不与树边重合） ---
+    order = list(range(1, n + 1))
+    rng.shuffle(order)
+    chords = set()
+    for w, v in _sample_pairs(n, 0.75 * edge_prob, rng):
+        a, b = order[w], order[v]
+        if b not in adjacency[a]:
+            chords.add((a, b) if a < b else (b, a))
+
+    # --- 3. 欧拉图修正：奇度点两两配对，只翻转非树边 ---
+    degree = [len(adjacency[v]) for v in range(n + 1)]
+    for a, b in chords:
+        degree[a] += 1
+        degree[b] += 1
+    odd_degree_nodes = [v for v in order if degree[v] % 2]
+    for u, v in zip(odd_degree_nodes[0::2], odd_degree_nodes[1::2]):
+        if v not in adjacency[u]:
+            _toggle(chords, u, v)
+            continue
+        # u、v 是树边的两端：借一个与两者在树上都不相邻的点 w，翻转 (u, w)、(w, v)
+        start = rng.randrange(n)
+        w = next((order[(start + i) % n] for i in range(n)
+                  if order[(start + i) % n] not in adjacency[u] | adjacency[v] | {u, v}), None)
+        if w is not None:
+            _toggle(chords, u, w)
+            _toggle(chords, w, v)
+            continue
+        # 所有点都挂在 u 或 v 上（双星）：x 是 v 的另一个邻居、y 是 u 的另一个邻居，
+        # 翻转 (u, x)、(x, y)、(y, v)，三条都不是树边（否则树里有环）；树不是星形，x、y 一定存在
+        x = min(adjacency[v] - {u})
+        y = min(adjacency[u] - {v})
+        _toggle(chords, u, x)
+        _toggle(chords, x, y)
+        _toggle(chords, y, v)
+
+    # --- 4. 路径调整：删掉一条弦，两端变成奇度点，生成树仍然连通 ---
+    # 修正后每个点的度数都是偶数，而树至少有两个叶子，所以一定有弦可删
+    if type == "path":
+        chords.remove(rng.choice(sorted(chords)))
+
+    return _format(n, tree_edges, chords)
+
+
+def _format(n, backbone, chords):
     # 格式化输出
+    edges = [(a, b) if a < b else (b, a) for a, b in backbone]
+    edges.extend(chords)
+    edges.sort()
     return {
-        "nodes": nodes,
-        "edges": list(G.edges())
-    }
\ No newline at end of file
+        "nodes": list(range(1, n + 1)),
+        "edges": edges,
+    }
+
+
+# 关卡生成逻辑的版本号：生成结果有变化时递增，使已落盘的旧关卡失效
+LEVEL_VERSION = 3
+
+# 各难度的节点数范围、边概率与图类型
+DIFFICULTY_SETTINGS = {
+    "easy": {"nodes": (4, 6), "edge_prob": 0.3, "type": "circuit"},     # 4-6个节点
+    "medium": {"nodes": (5, 7), "edge_prob": 0.5, "type": "circuit"},   # 5-7个节点
+    "hard": {"nodes": (6, 9), "edge_prob": 0.7, "type": "path"},        # 6-9个节点
+}
+
+
+@timed("generate")
+def generate_level(difficulty="easy", index=1):
+    """
+    按 (难度, 关卡编号) 生成关卡，相同输入总是得到相同的图。
+
+    Args:
+        difficulty (str): 'easy' / 'medium' / 'hard'，未知难度按 easy 的节点数、hard 的稠密度生成。
+        index (int): 关卡编号，同时作为随机种子。
+
+    Returns:
+        dict: 包含 'nodes' 和 'edges' 键的图数据字典。
+    """
+    # 获取当前难度的范围，默认easy
+    min_nodes, max_nodes = DIFFICULTY_SETTINGS.get(difficulty, DIFFICULTY_SETTINGS["easy"])["nodes"]
+    settings = DIFFICULTY_SETTINGS.get(difficulty, DIFFICULTY_SETTINGS["hard"])
+    # 在范围内随机选择节点数（确保每次相同index生成相同的图）
+    # 每次请求用自己的 Random 实例，以 index 为种子；不碰全局 random.seed，线程池里并发生成也可复现
+    rng = random.Random(index)
+    num_nodes = rng.randint(min_nodes, max_nodes)
+    return generate_eulerian_graph_data(
+        num_nodes=num_nodes, edge_prob=settings["edge_prob"], type=settings["type"], rng=rng
+    )
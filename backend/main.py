@@ -1,21 +1,85 @@
-import random
-from fastapi import FastAPI
-from pydantic import BaseModel
-from typing import List, Tuple, Optional
+import json
+import os
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, ValidationError
+from typing import Iterator, List, Tuple, Optional
 from fastapi.middleware.cors import CORSMiddleware
 
 # --- Use find_euler_path for the /solve endpoint ---
 from algorithms.euler import find_euler_path
 
 # 新增导入
-from algorithms.euler import find_next_step
+from algorithms.euler import classify_after, parse_edge_keys, pick_next_move
 from collections import defaultdict
-from generate_graph import generate_eulerian_graph_data
+from algorithms.euler import GameState
+from algorithms.graph import get_graph, get_graph_flat, graph_cache_stats
+from algorithms.verify import PathVerifier
+from services.level_store import LevelStore, parse_index_range
+from services.explain_cache import ExplanationCache, explanation_key
+from services.llm_client import close_client, explain_locally, explain_with_llm, llm_enabled, stream_with_llm
+from services.metrics import (
+    METRICS_ENABLED, MetricsMiddleware, count_event, observe_size, register_cache, render_metrics,
+)
+from services.sessions import SessionStore
+from services.solve_cache import SOLVE_MODES, SolveCache, flatten_for_offload
+from services.trail_cache import TrailCache
+from services.wire import (
+    WIRE_MEDIA_TYPE, WireGraph, WireHint, decode_graph, decode_hint,
+    encode_graph, encode_move, encode_path, encode_strokes, is_wire_body, stream_ints, wants_wire,
+)
+from services.workers import (
+    OFFLOAD_MIN_EDGES, Overloaded, level_task, offload, prestart_pool, run_batch, shutdown_pool, solve_task,
+)
 
 app = FastAPI()
 app.add_middleware(
     CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]
 )
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+sessions = SessionStore()
+levels = LevelStore()
+trails = TrailCache()
+solutions = SolveCache()
+explanations = ExplanationCache()
+for _name, _cache in (("solve", solutions), ("trails", trails), ("levels", levels), ("sessions", sessions),
+                      ("explanations", explanations)):
+    register_cache(_name, _cache.stats)
+register_cache("graphs", graph_cache_stats)
+# 同一张图的解永远有效：允许浏览器 / nginx 缓存一天，过期后凭 ETag 重新验证
+SOLVE_CACHE_CONTROL = "public, max-age=86400"
+# 批量接口一次最多处理的图 / 关卡数
+BATCH_MAX = int(os.getenv("BATCH_MAX", "1000"))
+
+
+@app.on_event("startup")
+def prewarm_levels():
+    # 例如 LEVEL_PREWARM=1-200：启动时预生成各难度第 1~200 关；
+    # 由 serve.py 启动时父进程已经预热过（SERVE_PREWARMED=1），worker 直接共享结果
+    if os.getenv("SERVE_PREWARMED") == "1":
+        return
+    indices = parse_index_range(os.getenv("LEVEL_PREWARM", ""))
+    if indices:
+        count = levels.prewarm(indices)
+        print(f"Prewarmed {count} levels")
+
+
+@app.on_event("startup")
+def start_workers():
+    # 大请求分流到进程池（见 services/workers.offload），先把子进程拉起来
+    prestart_pool()
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    # 进程池排满或超出时间预算：让客户端稍后重试，不拖慢其它请求
+    return JSONResponse(
+        status_code=503, content={"ok": False, "error": exc.message},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 # --- Use simple GraphInput for /solve ---
@@ -30,6 +94,30 @@ class HintInput(BaseModel):
     edges: List[Tuple[int, int]]
     visitedEdges: List[str]  # 形如 ["1-2","2-3"]
     pathEndpoint: Optional[int] = None  # 当前端点，或空
+    detail: bool = False  # 为真时附带当前端点所有可走边的分类 (safe / bridge / dead_end)
+
+
+# 提交校验：按关卡校验时只需要 path
+class VerifyInput(BaseModel):
+    nodes: List[int] = []
+    edges: List[Tuple[int, int]] = []
+    path: List[int]
+
+
+# 讲解请求：局面同 /hint，可附带一张截图
+class ExplainInput(BaseModel):
+    nodes: List[int]
+    edges: List[Tuple[int, int]]
+    visitedEdges: List[str]
+    pathEndpoint: Optional[int] = None
+    image: Optional[str] = None  # PNG 截图的 base64，仅供模型辅助核对
+
+
+# 会话：走一步
+class MoveInput(BaseModel):
+    to: int
+    start: Optional[int] = Field(None, alias="from")  # 仅第一步需要
+    hint: bool = False  # 为真时顺带返回下一步提示，省一次往返
 
 
 @app.get("/generate")
@@ -112,34 +200,111 @@ def generate_demo():
 # --- ^ ^ ^ --- Verified Fixed Levels End --- ^ ^ ^ ---
 
 
+# --- V V V --- 内容协商：请求体按 Content-Type、响应按 Accept 选择 JSON 或紧凑二进制 --- V V V ---
+
+async def _read_body(request: Request, model, decode):
+    if is_wire_body(request):
+        payload = decode(await request.body())
+        observe_size(request.url.path, len(payload.nodes), len(payload.flat) // 2)
+        return payload
+    try:
+        payload = model(**await request.json())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="请求体不是有效的 JSON 对象")
+    observe_size(request.url.path, len(payload.nodes), len(payload.edges))
+    return payload
+
+
+async def read_graph(request: Request):
+    return await _read_body(request, GraphInput, decode_graph)
+
+
+async def read_hint(request: Request):
+    return await _read_body(request, HintInput, decode_hint)
+
+
+def _body_schema(model) -> dict:
+    # 请求体由依赖项自行解析，这里补上 OpenAPI 文档里的两种格式
+    return {"requestBody": {"required": True, "content": {
+        "application/json": {"schema": model.model_json_schema()},
+        WIRE_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    }}}
+
+
+def _wire_response(content: bytes, headers=None) -> Response:
+    return Response(content=content, media_type=WIRE_MEDIA_TYPE, headers=headers)
+
+
 @app.get("/level")
-def get_level(difficulty: str = "easy", index: int = 1):
-    print(f"Generating level for difficulty: {difficulty}, index: {index}")
-    # 定义各难度的节点数范围
-    difficulty_ranges = {
-        "easy": (4, 6),     # 4-6个节点
-        "medium": (5, 7),   # 5-7个节点  
-        "hard": (6, 9)      # 6-9个节点
-    }
-    # 获取当前难度的范围，默认easy
-    min_nodes, max_nodes = difficulty_ranges.get(difficulty, (4, 6))
-    # 在范围内随机选择节点数（确保每次相同index生成相同的图）
-    random.seed(index)  # 用index作为种子，保证相同index生成相同关卡
-    num_nodes = random.randint(min_nodes, max_nodes)
-    if difficulty == "easy":
-        graph = generate_eulerian_graph_data(num_nodes=num_nodes, edge_prob=0.3, type="circuit")
-    elif difficulty == "medium":
-        graph = generate_eulerian_graph_data(num_nodes=num_nodes, edge_prob=0.5, type="circuit")
-    else:  # hard
-        graph = generate_eulerian_graph_data(num_nodes=num_nodes, edge_prob=0.7, type="path")
-    return graph
-
-
-@app.post("/solve")
-def solve_graph(graph: GraphInput):
-    # Use find_euler_path to get the full path
-    path = find_euler_path(graph.nodes, graph.edges)
+def get_level(response: Response, difficulty: str = "easy", index: int = 1, layout: bool = False,
+              wire: bool = Depends(wants_wire)):
+    # 关卡只在第一次被请求时生成，之后从内存 / 磁盘缓存中读取
+    level = levels.get(difficulty, index)
+    if wire:
+        # 二进制响应只有图，不带坐标
+        return _wire_response(encode_graph(level["nodes"], level["edges"]), {"Vary": "Accept"})
+    response.headers["Vary"] = "Accept"
+    if layout:
+        # layout=true：附带服务端算好的归一化坐标 [[x, y], ...]，与 nodes 一一对应
+        return {**level, "layout": levels.layout(difficulty, index)}
+    return level
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # 弱比较：忽略 W/ 前缀，支持逗号分隔的多个值和 *
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in (t.removeprefix("W/") for t in tags)
+
+
+@app.post("/solve", openapi_extra=_body_schema(GraphInput))
+def solve_graph(request: Request, response: Response, mode: str = "euler", closed: bool = False,
+                graph=Depends(read_graph), wire: bool = Depends(wants_wire)):
+    # mode=postman：图不能一笔画时求中国邮递员路线（重走最少的边），closed=true 要求回到起点
+    # mode=strokes：把图（可以不连通）拆成最少的几笔
+    if mode not in SOLVE_MODES:
+        return {"ok": False, "error": f"未知的求解模式: {mode}"}
+    # 以图指纹为键：客户端带着上次的 ETag 来时，连求解都不用做
+    binary_body = isinstance(graph, WireGraph)
+    edges, flat = (None, graph.flat) if binary_body else (graph.edges, None)
+    if (len(flat) // 2 if binary_body else len(edges)) >= OFFLOAD_MIN_EDGES:
+        # 大图：算键和求解都交给进程池，边只转换一次成扁平列表，两次传给子进程都用它
+        edges, flat = None, flatten_for_offload(edges, flat)
+    key = solutions.key(graph.nodes, edges, mode, closed, flat_edges=flat)
+    # 两种表示的 ETag 不能相同
+    etag = f'W/"{key}:bin"' if wire else f'W/"{key}"'
+    headers = {"ETag": etag, "Cache-Control": SOLVE_CACHE_CONTROL, "Vary": "Accept"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    # Use find_euler_path to get the full path (cached by fingerprint)
+    # 二进制请求的小图直接把请求体上的端点视图交给求解器，不复制
+    _, entry = solutions.solve(graph.nodes, edges, key, flat_edges=flat, mode=mode, closed=closed)
+    if mode == "strokes":
+        if wire:
+            return _wire_response(encode_strokes(entry["strokes"]), headers)
+        response.headers.update(headers)
+        return {"ok": True, "strokes": entry["strokes"]}
+    path = entry["path"]
+    if wire and path is not None:
+        # 二进制响应只带路径；postman 模式下重走的边可由路径与原图对比得出
+        return _wire_response(encode_path(path), headers)
+    response.headers.update(headers)
+    if mode == "postman":
+        return _postman_result(entry)
+    return _solve_result(graph, path)
 
+
+def _postman_result(entry: dict):
+    if entry["path"] is None:
+        return {"ok": False, "error": "图的边不连通，无法用一条路线走完所有边"}
+    return {"ok": True, "path": entry["path"], "retraced": entry["retraced"], "closed": entry["closed"]}
+
+
+def _solve_result(graph: GraphInput, path: Optional[List[int]]):
     if path is None:
         # Verify if the graph data itself is flawed (should not happen with fixed levels)
         d = defaultdict(int)
@@ -156,19 +321,431 @@ def solve_graph(graph: GraphInput):
         print(
             f"CRITICAL: find_euler_path failed on fixed level! Odd nodes: {len(odd_nodes)}"
         )
+        count_event("invalid_level")
         return {"ok": False, "error": f"关卡设计错误 (奇数点: {len(odd_nodes)})"}
 
     # Return the full path
     return {"ok": True, "path": path}
 
 
-@app.post("/hint")
-def hint_next_step(payload: HintInput):
-    move, err = find_next_step(
-        payload.nodes, payload.edges, payload.visitedEdges, payload.pathEndpoint
+# --- V V V --- 批量接口：一次请求处理多个图 / 关卡，可选 NDJSON 流式返回 --- V V V ---
+
+class SolveBatchInput(BaseModel):
+    graphs: List[GraphInput]
+
+
+def _ndjson(items) -> Iterator[str]:
+    for item in items:
+        yield json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _solve_many(graphs: List[GraphInput]) -> Iterator[Tuple[int, dict]]:
+    """先查缓存，未命中的按指纹去重后交给进程池；按完成顺序产出 (下标, 结果)。"""
+    pending = {}  # 缓存键 -> 需要这个结果的下标
+    for i, graph in enumerate(graphs):
+        key = solutions.key(graph.nodes, graph.edges)
+        entry = solutions.lookup(key)
+        if entry is not None:
+            yield i, _solve_result(graph, entry["path"])
+        else:
+            pending.setdefault(key, []).append(i)
+    keys = list(pending)
+    tasks = [(graphs[pending[key][0]].nodes, graphs[pending[key][0]].edges) for key in keys]
+    for j, path in run_batch(solve_task, tasks):
+        solutions.put(keys[j], path)
+        for i in pending[keys[j]]:
+            yield i, _solve_result(graphs[i], path)
+
+
+def _levels_many(difficulty: str, indices: List[int]) -> Iterator[Tuple[int, dict]]:
+    """先查关卡包与缓存，缺的关卡交给进程池生成并写回缓存。"""
+    missing = []
+    for i, index in enumerate(indices):
+        level = levels.lookup(difficulty, index)
+        if level is not None:
+            yield i, level
+        else:
+            missing.append(i)
+    tasks = [(difficulty, indices[i]) for i in missing]
+    for j, level in run_batch(level_task, tasks):
+        i = missing[j]
+        levels.put(difficulty, indices[i], level)
+        yield i, level
+
+
+@app.post("/solve/batch")
+def solve_batch(payload: SolveBatchInput, stream: bool = False):
+    if len(payload.graphs) > BATCH_MAX:
+        return {"ok": False, "error": f"一次最多求解 {BATCH_MAX} 个图"}
+    results = _solve_many(payload.graphs)
+    if stream:
+        # 每算完一个图就输出一行 {"index": 下标, "ok": ..., ...}，顺序不保证
+        return StreamingResponse(
+            _ndjson({"index": i, **result} for i, result in results),
+            media_type="application/x-ndjson",
+        )
+    ordered = [None] * len(payload.graphs)
+    for i, result in results:
+        ordered[i] = result
+    return {"ok": True, "results": ordered}
+
+
+@app.get("/levels")
+def get_levels(difficulty: str = "easy", indices: str = "1-10", stream: bool = False):
+    # indices 形如 "1-50" 或 "20"（即 1~20）
+    try:
+        index_range = parse_index_range(indices)
+    except ValueError:
+        return {"ok": False, "error": f"无效的关卡范围: {indices}"}
+    if len(index_range) > BATCH_MAX:
+        return {"ok": False, "error": f"一次最多获取 {BATCH_MAX} 个关卡"}
+    numbers = list(index_range)
+    results = _levels_many(difficulty, numbers)
+    if stream:
+        return StreamingResponse(
+            _ndjson({"index": numbers[i], **level} for i, level in results),
+            media_type="application/x-ndjson",
+        )
+    ordered = [None] * len(numbers)
+    for i, level in results:
+        ordered[i] = {"index": numbers[i], **level}
+    return {"ok": True, "difficulty": difficulty, "levels": ordered}
+
+
+@app.on_event("shutdown")
+def stop_workers():
+    shutdown_pool()
+
+
+@app.on_event("shutdown")
+async def stop_llm_client():
+    await close_client()
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    # 各级缓存的命中情况，用于调整容量
+    return {
+        "solve": solutions.stats(),
+        "trails": trails.stats(),
+        "levels": levels.stats(),
+        "sessions": sessions.stats(),
+        "explanations": explanations.stats(),
+        "graphs": graph_cache_stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus 抓取：路由延迟、内部阶段耗时、请求规模直方图与各级缓存命中率（见 services/metrics.py）
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.post("/hint", openapi_extra=_body_schema(HintInput))
+def hint_next_step(payload=Depends(read_hint), wire: bool = Depends(wants_wire)):
+    if isinstance(payload, WireHint):
+        visited = list(payload.visited_pairs())
+    else:
+        visited = list(parse_edge_keys(payload.visitedEdges))
+    # 玩家一直沿着参考路径走时直接查表；偏离之后才做桥检测
+    if not payload.detail:
+        move = trails.next_move_pairs(payload.nodes, payload.edges, visited, payload.pathEndpoint)
+        if move:
+            return _wire_response(encode_move(move)) if wire else {"ok": True, "move": move}
+    # 大图的桥检测交给进程池，不占用本进程的 GIL
+    result = _hint_response(
+        offload(classify_after, payload.nodes, payload.edges, visited, payload.pathEndpoint,
+                size=len(payload.edges)),
+        payload.detail,
     )
+    # 带分类详情或出错时仍返回 JSON
+    if wire and result["ok"] and not payload.detail:
+        return _wire_response(encode_move(result["move"]))
+    return result
+
+
+def _hint_response(classified, detail: bool = False):
+    classification, err = classified
     if err:
         return {"ok": False, "message": err}
+    move = pick_next_move(classification)
     if not move:
         return {"ok": False, "message": "无法给出下一步"}
+    if detail:
+        return {"ok": True, "move": move, "classification": classification}
     return {"ok": True, "move": move}  # [from, to]
+
+
+# --- V V V --- 自然语言讲解：大模型限时生成，超时或未配置时退回本地讲解 --- V V V ---
+
+@app.post("/explain")
+async def explain_move(payload: ExplainInput, stream: bool = False):
+    # stream=true：以 SSE 推送，event: delta 逐段给出文字，最后 event: done 给出推荐的一步和来源
+    visited = list(parse_edge_keys(payload.visitedEdges))
+    classification, err = await run_in_threadpool(
+        offload, classify_after, payload.nodes, payload.edges, visited, payload.pathEndpoint,
+        size=len(payload.edges),
+    )
+    move = pick_next_move(classification) if classification else None
+    fallback = explain_locally(classification, err, move)
+    state = {
+        "nodes": payload.nodes,
+        "edges": payload.edges,
+        "visitedEdges": payload.visitedEdges,
+        "pathEndpoint": payload.pathEndpoint,
+        "classification": classification,
+    }
+    # 已通关 / 走进死胡同时不必再问模型；同一局面（与截图无关）的讲解按规范键缓存，并发的相同请求只调用一次模型
+    key = None
+    if err is None and llm_enabled():
+        key = await run_in_threadpool(explanation_key, payload.nodes, payload.edges, visited, payload.pathEndpoint, move)
+    if stream:
+        return StreamingResponse(
+            _explain_events(payload.image, state, move, fallback, key),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    text, cached = None, False
+    if key is not None:
+        text, cached = await explanations.explain(key, lambda: explain_with_llm(payload.image, state, move))
+    return {"ok": True, "move": move, "explanation": text or fallback, "source": "llm" if text else "local",
+            "cached": cached}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _explain_events(image: Optional[str], state: dict, move, fallback: str, key: Optional[str]):
+    source, cached = "local", False
+    if key is not None:
+        text = explanations.get(key)
+        cached = text is not None
+        found = False
+        if text is None:
+            found, text = await explanations.wait_pending(key)
+        if text is not None:
+            # 缓存命中，或等到了进行中的相同请求：整段一次发出
+            source = "llm"
+            yield _sse("delta", {"text": text})
+        elif not found:
+            leader = explanations.lead(key)
+            try:
+                async for delta in stream_with_llm(image, state, move, on_complete=leader.set_result):
+                    source = "llm"
+                    yield _sse("delta", {"text": delta})
+            finally:
+                # 超时、出错或客户端断开：让等待中的相同请求各自退回本地讲解
+                if not leader.done():
+                    leader.set_result(None)
+    if source == "local":
+        # 时限内一个字都没收到：立即给出本地讲解
+        yield _sse("delta", {"text": fallback})
+    yield _sse("done", {"move": move, "source": source, "cached": cached})
+
+
+# --- V V V --- 提交校验：一遍扫描检查玩家提交的完整路径（排行榜用）--- V V V ---
+
+@app.post("/verify", openapi_extra=_body_schema(VerifyInput))
+async def verify_path(request: Request, difficulty: Optional[str] = None, index: int = 1):
+    # 给出 difficulty 时按服务端保存的关卡校验（客户端只提交路径），否则请求体里自带图
+    graph = None
+    if difficulty is not None:
+        graph = await run_in_threadpool(_level_graph, difficulty, index)
+    if is_wire_body(request):
+        return await _verify_stream(request, graph)
+    payload = await _read_body(request, VerifyInput, None)
+    if graph is None:
+        graph = await run_in_threadpool(get_graph, payload.nodes, payload.edges)
+    verifier = PathVerifier(graph)
+    verifier.feed(payload.path)
+    return verifier.result()
+
+
+def _level_graph(difficulty: str, index: int):
+    level = levels.get(difficulty, index)
+    return get_graph(level["nodes"], level["edges"])
+
+
+async def _verify_stream(request: Request, graph):
+    """二进制请求体边收边验：先凑齐图（按关卡校验时没有），之后的整数都是路径顶点，遇到第一个错误就停止读取。"""
+    verifier = PathVerifier(graph) if graph is not None else None
+    header: List[int] = []
+    async for ints in stream_ints(request):
+        if verifier is None:
+            header.extend(ints.tolist())
+            if len(header) < 2:
+                continue
+            n, e = header[0], header[1]
+            if n < 0 or e < 0:
+                raise HTTPException(status_code=400, detail="二进制请求体长度与头部不符")
+            end = 2 + n + 2 * e
+            if len(header) < end:
+                continue
+            graph = await run_in_threadpool(get_graph_flat, header[2:2 + n], header[2 + n:end])
+            verifier = PathVerifier(graph)
+            ints = header[end:]
+        if not verifier.feed(ints):
+            break
+    if verifier is None:
+        raise HTTPException(status_code=400, detail="二进制请求体缺少图数据")
+    return verifier.result()
+
+# --- ^ ^ ^ --- 提交校验结束 --- ^ ^ ^ ---
+
+
+# --- V V V --- 服务端会话：增量维护剩余图，每次只传一步 --- V V V ---
+
+def _state_payload(state):
+    return {
+        "ok": True,
+        "endpoint": state.endpoint,
+        "remaining": state.remaining,
+        "done": state.remaining == 0,
+    }
+
+
+def _session_state(session):
+    return {"sessionId": session.id, **_state_payload(session.state)}
+
+
+@app.post("/session")
+def create_session(graph: GraphInput):
+    session = sessions.create(graph.nodes, graph.edges)
+    return _session_state(session)
+
+
+@app.post("/session/{session_id}/move")
+def session_move(session_id: str, payload: MoveInput):
+    session = sessions.get(session_id)
+    if session is None:
+        return {"ok": False, "message": "会话不存在或已过期"}
+    with session.lock:
+        err = session.state.move(payload.to, payload.start)
+        if err:
+            return {"ok": False, "message": err}
+        result = _session_state(session)
+        if payload.hint and not result["done"]:
+            result["hint"] = _hint_response(session.state.classify())
+    return result
+
+
+@app.post("/session/{session_id}/undo")
+def session_undo(session_id: str):
+    session = sessions.get(session_id)
+    if session is None:
+        return {"ok": False, "message": "会话不存在或已过期"}
+    with session.lock:
+        if not session.state.undo():
+            return {"ok": False, "message": "没有可以撤销的步骤"}
+        return _session_state(session)
+
+
+@app.get("/session/{session_id}/hint")
+def session_hint(session_id: str, detail: bool = False):
+    session = sessions.get(session_id)
+    if session is None:
+        return {"ok": False, "message": "会话不存在或已过期"}
+    with session.lock:
+        return _hint_response(session.state.classify(), detail)
+
+
+@app.delete("/session/{session_id}")
+def delete_session(session_id: str):
+    return {"ok": sessions.delete(session_id)}
+
+# --- ^ ^ ^ --- 服务端会话结束 --- ^ ^ ^ ---
+
+
+# --- V V V --- WebSocket 对局通道：一次连接内连续收发走步 / 撤销 / 提示 --- V V V ---
+#
+# 客户端消息（JSON）：
+#   {"type": "open", "nodes": [...], "edges": [...]}   或   {"type": "open", "difficulty": "easy", "index": 1}
+#   {"type": "move", "to": 3, "from": 1, "hint": false}   ("from" 仅第一步需要)
+#   {"type": "undo"}
+#   {"type": "hint", "detail": false}
+# 服务端对每条消息回一条 {"type": 同上, "ok": ..., ...}，字段与 /session 系列接口一致。
+# 只接受 JSON 文本帧；二进制帧、格式错误的消息回 {"ok": false, "message": 原因}，连接保持。
+
+def _open_state(message):
+    """
+    按消息里的图数据或 (difficulty, index) 建立对局状态；后者同时返回关卡数据。
+    图数据与 POST /session 一样经 GraphInput 校验，格式不对时抛出 ValidationError。
+    """
+    if "edges" in message:
+        graph = GraphInput(nodes=message.get("nodes", []), edges=message["edges"])
+        return GameState(graph.nodes, graph.edges), None
+    level = levels.get(message.get("difficulty", "easy"), int(message.get("index", 1)))
+    return GameState(level["nodes"], level["edges"]), level
+
+
+def _validation_message(e: ValidationError) -> str:
+    details = "; ".join(
+        f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()[:3]
+    )
+    return f"关卡数据格式错误（{details}）"
+
+
+async def _receive_message(websocket: WebSocket):
+    """读一条客户端消息，返回 (消息, 错误)：只接受 JSON 文本帧，二进制帧与无法解析的文本给出原因。"""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    if message.get("text") is None:
+        return None, "不支持二进制消息，请以 JSON 文本发送"
+    try:
+        return json.loads(message["text"]), None
+    except ValueError:
+        return None, "消息不是有效的 JSON"
+
+
+@app.websocket("/ws/play")
+async def play_channel(websocket: WebSocket):
+    await websocket.accept()
+    state = None
+    try:
+        while True:
+            message, error = await _receive_message(websocket)
+            kind = message.get("type") if isinstance(message, dict) else None
+            if error:
+                reply = {"ok": False, "message": error}
+            elif kind == "open":
+                try:
+                    state, level = await run_in_threadpool(_open_state, message)
+                except ValidationError as e:
+                    reply = {"ok": False, "message": _validation_message(e)}
+                except (KeyError, TypeError, ValueError):
+                    reply = {"ok": False, "message": "关卡数据格式错误"}
+                else:
+                    reply = _state_payload(state)
+                    if level is not None:
+                        reply["level"] = level
+            elif state is None:
+                reply = {"ok": False, "message": "请先发送 open 消息打开关卡"}
+            elif kind == "move":
+                try:
+                    err = state.move(int(message["to"]), message.get("from"))
+                except (KeyError, TypeError, ValueError):
+                    err = "走步消息格式错误"
+                if err:
+                    reply = {"ok": False, "message": err}
+                else:
+                    reply = _state_payload(state)
+                    if message.get("hint") and not reply["done"]:
+                        reply["hint"] = _hint_response(await run_in_threadpool(state.classify))
+            elif kind == "undo":
+                if state.undo():
+                    reply = _state_payload(state)
+                else:
+                    reply = {"ok": False, "message": "没有可以撤销的步骤"}
+            elif kind == "hint":
+                reply = _hint_response(
+                    await run_in_threadpool(state.classify), bool(message.get("detail"))
+                )
+            else:
+                reply = {"ok": False, "message": f"未知的消息类型: {kind}"}
+            await websocket.send_json({"type": kind, **reply})
+    except WebSocketDisconnect:
+        pass
+
+# --- ^ ^ ^ --- WebSocket 对局通道结束 --- ^ ^ ^ ---
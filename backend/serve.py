@@ -0,0 +1,177 @@
+"""
+预派生（prefork）方式启动后端：父进程先导入应用、加载关卡包、预生成并预解关卡，
+然后 fork 出多个 worker，它们以写时复制的方式共享这些内存，并从同一个监听 socket 接受连接。
+
+    python serve.py --host 0.0.0.0 --port 8000 --workers 2
+    LEVEL_PACK=data/levels.pack.json.gz LEVEL_PREWARM=1-200 python serve.py --workers 4 --preload numpy
+
+启动时打印应用导入耗时、预热耗时，以及父进程和每个 worker 就绪时的内存：
+RSS 是各自驻留的全部内存，PSS 把共享页按共享进程数分摊，两者之差就是写时复制省下的部分。
+不支持 fork 的平台（Windows）或 --workers 1 时退回单进程 uvicorn。
+"""
+import argparse
+import gc
+import importlib
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+
+
+def _memory() -> Dict[str, float]:
+    """当前进程的 RSS / PSS（MB）；没有 /proc 时只给出峰值 RSS。"""
+    try:
+        memory = {}
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss"):
+                    memory[name.lower()] = int(value.split()[0]) / 1024
+        return memory
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以 KB 计，macOS 以字节计
+        return {"rss": peak / (1024 * 1024 if sys.platform == "darwin" else 1024)}
+
+
+def _format_memory(memory: Dict[str, float]) -> str:
+    return ", ".join(f"{name.upper()} {value:.1f} MB" for name, value in memory.items())
+
+
+def preload(modules: List[str]):
+    """
+    在父进程里做一次、所有 worker 共享的准备工作，返回应用对象：
+      1. 导入应用（关卡包在 LevelStore 构造时加载）；
+      2. 导入 --preload 指定的重量级模块（默认按需导入，见 algorithms.layout / postman、services.llm_client）；
+      3. 预生成 LEVEL_PREWARM 范围内的关卡，并算好它们的解、参考路径和 CSR 图；
+      4. 关闭预热时打开的 SQLite 连接。
+    这里不能启动线程或进程池：fork 只复制调用线程，持有中的锁会被原样带进子进程。
+    每个 worker 的启动钩子只拉起自己的求解进程池（进程池不能跨 fork 共享），不再重复预热。
+    """
+    start = time.perf_counter()
+    import main
+    from generate_graph import DIFFICULTY_SETTINGS
+    from services.disk_store import close_all
+    from services.level_store import parse_index_range
+
+    print(f"[serve] imported app in {time.perf_counter() - start:.2f}s")
+    for name in modules:
+        begin = time.perf_counter()
+        importlib.import_module(name)
+        print(f"[serve] preloaded {name} in {time.perf_counter() - begin:.2f}s")
+
+    begin = time.perf_counter()
+    indices = parse_index_range(os.getenv("LEVEL_PREWARM", ""))
+    count = main.levels.prewarm(indices) if indices else 0
+    solved = 0
+    for difficulty in DIFFICULTY_SETTINGS:
+        for index in indices:
+            level = main.levels.lookup(difficulty, index)
+            if level is None:
+                continue
+            main.solutions.solve(level["nodes"], level["edges"])
+            main.trails.get(level["nodes"], level["edges"])
+            solved += 1
+    if count:
+        print(f"[serve] prewarmed {count} levels, solved {solved} in {time.perf_counter() - begin:.2f}s")
+
+    # worker（以及单进程时的 uvicorn）的启动钩子不必再预热一遍
+    os.environ["SERVE_PREWARMED"] = "1"
+    # 预热时打开的 SQLite 连接不能带进子进程，worker 第一次访问时各自重新打开
+    close_all()
+    # 把预热出来的对象移出垃圾回收的扫描范围，worker 里的 GC 不会再去写这些页，共享得以保持
+    gc.collect()
+    gc.freeze()
+    print(f"[serve] parent ready in {time.perf_counter() - start:.2f}s, {_format_memory(_memory())}")
+    return main.app
+
+
+class WorkerServer(uvicorn.Server):
+    """就绪（开始接受连接）时报告从 fork 到就绪的耗时与内存。"""
+
+    def __init__(self, config: uvicorn.Config, forked_at: float):
+        super().__init__(config)
+        self.forked_at = forked_at
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        print(f"[serve] worker {os.getpid()} ready in {time.perf_counter() - self.forked_at:.2f}s, "
+              f"{_format_memory(_memory())}", flush=True)
+
+
+def _spawn(config: uvicorn.Config, sock) -> int:
+    forked_at = time.perf_counter()
+    pid = os.fork()
+    if pid:
+        return pid
+    # 子进程：恢复默认信号处理（uvicorn 会装上自己的），跑完后直接退出，不回到父进程的监管循环；
+    # 用 sys.exit 而不是 os._exit，让进程池等对象的清理函数照常执行
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, signal.SIG_DFL)
+    WorkerServer(config, forked_at).run(sockets=[sock])
+    sys.exit(0)
+
+
+def serve(host: str, port: int, workers: int, modules: List[str], log_level: str) -> None:
+    app = preload(modules)
+    config = uvicorn.Config(app, host=host, port=port, log_level=log_level)
+    sock = config.bind_socket()
+    children: Dict[int, int] = {}  # pid -> worker 序号
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for slot in range(workers):
+        children[_spawn(config, sock)] = slot
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # 监管：worker 意外退出时从已预热的父进程重新 fork 一个
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        print(f"[serve] worker {pid} exited with status {status}, restarting", flush=True)
+        time.sleep(1)
+        if not stopping:
+            children[_spawn(config, sock)] = slot
+    sock.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="预派生多 worker 启动后端")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")))
+    parser.add_argument("--preload", default=os.getenv("SERVE_PRELOAD", ""),
+                        help="fork 之前在父进程里导入的模块，逗号分隔，例如 numpy,networkx,openai")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    modules = [name for name in args.preload.split(",") if name]
+    # 在导入应用之前设置：每个 worker 的求解进程池按 CPU 核数 / worker 数分配（见 services/workers.py）
+    os.environ["WEB_CONCURRENCY"] = str(max(args.workers, 1))
+
+    if args.workers <= 1 or not hasattr(os, "fork"):
+        uvicorn.run(preload(modules), host=args.host, port=args.port, log_level=args.log_level)
+        return
+    serve(args.host, args.port, args.workers, modules, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
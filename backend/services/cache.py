@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    线程安全的有界 LRU 缓存，可选 TTL。
+    FastAPI 的同步接口跑在线程池里，所有读写都在一把锁内完成。
+
+    Args:
+        maxsize (int): 最多保留的条目数，超出时淘汰最久未使用的条目。
+        ttl (float | None): 条目存活秒数，None 表示永不过期。
+        sliding (bool): 为真时每次命中都会刷新过期时间（适合会话）。
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, sliding: bool = False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sliding = sliding
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, expires_at: Optional[float], now: float) -> bool:
+        return expires_at is not None and expires_at <= now
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or self._expired(item[0], now):
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            if self.sliding and self.ttl is not None:
+                self._data[key] = (now + self.ttl, item[1])
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            # 先清掉队首已过期的条目，再按容量淘汰
+            while self._data:
+                oldest_key, (oldest_exp, _) = next(iter(self._data.items()))
+                if len(self._data) > self.maxsize or self._expired(oldest_exp, now):
+                    del self._data[oldest_key]
+                else:
+                    break
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
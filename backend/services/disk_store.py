@@ -0,0 +1,86 @@
+import json
+import os
+import sqlite3
+import threading
+import weakref
+from typing import Any, Iterable, Optional, Tuple
+
+_stores: "weakref.WeakSet[DiskStore]" = weakref.WeakSet()
+
+
+class DiskStore:
+    """
+    基于 SQLite 的键值存储，值按紧凑 JSON 保存。
+    同一台机器上的多个 uvicorn worker 共享同一个文件（WAL 模式，读写互不阻塞）。
+    连接按线程、按进程分别创建，fork 之后不会误用父进程的连接；
+    但 SQLite 不允许打开的连接跨越 fork（子进程释放它时会破坏父进程的文件锁），
+    预先 fork worker 的父进程在 fork 之前要调用 close_all()。
+
+    Args:
+        path (str): 数据库文件路径，目录不存在时自动创建。
+        table (str): 表名，不同用途的数据放在不同的表里。
+        max_rows (int, optional): 行数上限；超出时按写入先后淘汰最早的行。
+            键来自不受信任的输入（如用户提交的图）时必须设置，否则文件会无限增长。
+    """
+
+    def __init__(self, path: str, table: str, max_rows: Optional[int] = None):
+        self.path = path
+        self.table = table
+        self.max_rows = max_rows
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        _stores.add(self)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self) -> None:
+        """关闭当前线程的连接，下次访问时重新打开。"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            if self._local.pid == os.getpid():
+                conn.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn().execute(
+            f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        rows = [(key, json.dumps(value, separators=(",", ":"))) for key, value in items]
+        if not rows:
+            return
+        conn = self._conn()
+        with conn:
+            # 多个 worker 可能同时生成同一条数据，结果相同，先写入者为准
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {self.table} (key, value) VALUES (?, ?)", rows
+            )
+            if self.max_rows:
+                # rowid 随写入递增：只保留最近写入的 max_rows 行（两次 rowid 索引查找，不扫表）
+                conn.execute(
+                    f"DELETE FROM {self.table} WHERE rowid <= (SELECT max(rowid) FROM {self.table}) - ?",
+                    (self.max_rows,),
+                )
+
+
+def close_all() -> None:
+    """关闭所有 DiskStore 在当前线程里打开的连接（fork 之前调用）。"""
+    for store in list(_stores):
+        store.close()
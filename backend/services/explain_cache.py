@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import json
+import os
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from algorithms.fingerprint import graph_fingerprint
+from services.cache import LRUCache
+from services.llm_client import LLM_MODEL
+
+EXPLAIN_CACHE_SIZE = int(os.getenv("EXPLAIN_CACHE_SIZE", "4096"))
+# 讲解不会因为时间而失效，TTL 只是为了让提示词或模型调整后旧答案逐渐淘汰
+EXPLAIN_CACHE_TTL = float(os.getenv("EXPLAIN_CACHE_TTL", "86400"))
+# 提示词变化时递增，旧的讲解随之失效
+EXPLAIN_VERSION = 1
+
+
+def explanation_key(nodes: Sequence[int], edges: Sequence[Tuple[int, int]], visited: Iterable[Tuple[int, int]],
+                    endpoint: Optional[int], move: Optional[Sequence[int]]) -> str:
+    """
+    局面的规范键：(关卡指纹, 剩余边多重集合, 当前端点, 推荐的一步, 模型)。
+    只看剩余的边而不看走过的顺序，走法不同但局面相同的玩家共用一条讲解；截图不参与。
+    """
+    remaining = Counter((a, b) if a < b else (b, a) for a, b in edges)
+    for a, b in visited:
+        edge = (a, b) if a < b else (b, a)
+        if remaining[edge]:
+            remaining[edge] -= 1
+    payload = json.dumps(
+        [graph_fingerprint(nodes, edges), sorted(remaining.elements()), endpoint,
+         list(move) if move else None, LLM_MODEL],
+        separators=(",", ":"),
+    )
+    return f"v{EXPLAIN_VERSION}:{hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()}"
+
+
+class ExplanationCache:
+    """
+    大模型讲解的缓存（LRU + TTL），并合并进行中的相同请求：
+    同一局面的请求同时到达时只有第一个真正调用模型，其余的等它的结果。
+    只缓存模型给出的答案；超时 / 失败（None）不缓存，下一次请求会重新尝试。
+    进行中的请求记在当前事件循环里，每个进程各自合并。
+    """
+
+    def __init__(self, maxsize: int = EXPLAIN_CACHE_SIZE, ttl: Optional[float] = EXPLAIN_CACHE_TTL):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+        self.coalesced = 0
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    def _track(self, key: str, future: "asyncio.Future[Optional[str]]") -> None:
+        self._inflight[key] = future
+
+        def finished(done: "asyncio.Future[Optional[str]]") -> None:
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+            if not done.cancelled() and done.exception() is None and done.result() is not None:
+                self._cache.set(key, done.result())
+
+        future.add_done_callback(finished)
+
+    async def wait_pending(self, key: str) -> Tuple[bool, Optional[str]]:
+        """有相同局面的请求正在进行时等它的结果，返回 (是否有, 结果)。"""
+        pending = self._inflight.get(key)
+        if pending is None:
+            return False, None
+        self.coalesced += 1
+        # shield：某个等待者断开时不取消共享的调用
+        return True, await asyncio.shield(pending)
+
+    async def explain(self, key: str, compute: Callable[[], Awaitable[Optional[str]]]) -> Tuple[Optional[str], bool]:
+        """
+        缓存 -> 进行中的相同请求 -> compute()。返回 (讲解或 None, 是否来自缓存)。
+        compute 在独立的任务里运行，发起者断开后仍会算完并写入缓存。
+        """
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached, True
+        found, text = await self.wait_pending(key)
+        if found:
+            return text, False
+        task = asyncio.ensure_future(compute())
+        self._track(key, task)
+        return await asyncio.shield(task), False
+
+    def lead(self, key: str) -> "asyncio.Future[Optional[str]]":
+        """
+        流式请求自己调用模型时登记为进行中，之后到达的相同请求等它：
+        完整收到答案后 set_result(全文)，超时 / 失败 / 断开时 set_result(None)。
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._track(key, future)
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["inflight"] = len(self._inflight)
+        stats["coalesced"] = self.coalesced
+        return stats
@@ -0,0 +1,58 @@
+import gzip
+import json
+import time
+from typing import Any, Dict, List
+
+# 关卡包文件格式：gzip 压缩的紧凑 JSON，边按扁平整数数组保存
+PACK_FORMAT = "one-stroke-level-pack"
+PACK_FORMAT_VERSION = 1
+
+
+def write_pack(path: str, levels: Dict[str, List[Dict[str, Any]]], meta: Dict[str, Any] = None) -> None:
+    """
+    写出关卡包。
+
+    Args:
+        path (str): 输出文件路径（建议以 .json.gz 结尾）。
+        levels (dict): 难度 -> [{"nodes": [...], "edges": [[u, v], ...], ...}, ...]，列表顺序即关卡编号顺序。
+        meta (dict): 附加信息（生成器版本、种子范围等），原样写入文件头。
+    """
+    packed = {}
+    for difficulty, items in levels.items():
+        packed[difficulty] = []
+        for level in items:
+            entry = {k: v for k, v in level.items() if k not in ("nodes", "edges")}
+            entry["nodes"] = list(level["nodes"])
+            entry["edges"] = [x for edge in level["edges"] for x in edge]
+            packed[difficulty].append(entry)
+    doc = {
+        "format": PACK_FORMAT,
+        "version": PACK_FORMAT_VERSION,
+        "created": int(time.time()),
+        "meta": meta or {},
+        "levels": packed,
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(doc, f, separators=(",", ":"))
+
+
+def load_pack(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    读取关卡包，返回 难度 -> 关卡列表（edges 还原为 [[u, v], ...]）。
+    文件格式或版本不对时抛出 ValueError。
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        doc = json.load(f)
+    if doc.get("format") != PACK_FORMAT:
+        raise ValueError(f"{path} 不是关卡包文件")
+    if doc.get("version") != PACK_FORMAT_VERSION:
+        raise ValueError(f"不支持的关卡包版本: {doc.get('version')}")
+    levels = {}
+    for difficulty, items in doc["levels"].items():
+        levels[difficulty] = []
+        for entry in items:
+            flat = entry["edges"]
+            level = dict(entry)
+            level["edges"] = [[flat[i], flat[i + 1]] for i in range(0, len(flat), 2)]
+            levels[difficulty].append(level)
+    return levels
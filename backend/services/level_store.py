@@ -0,0 +1,134 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from generate_graph import DIFFICULTY_SETTINGS, LEVEL_VERSION, generate_level
+from services.cache import LRUCache
+from services.disk_store import DiskStore
+from services.level_pack import load_pack
+
+# 关卡落盘位置，设为空字符串则只用内存缓存
+LEVEL_STORE_PATH = os.getenv(
+    "LEVEL_STORE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "levels.sqlite3")
+)
+LEVEL_CACHE_SIZE = int(os.getenv("LEVEL_CACHE_SIZE", "4096"))
+# 离线构建的关卡包（见 build_levels.py），存在时优先按编号查表
+LEVEL_PACK = os.getenv("LEVEL_PACK", "")
+
+
+class LevelStore:
+    """
+    关卡存储：每个 (难度, 编号) 只生成一次。
+    查找顺序：关卡包 -> 进程内 LRU -> 共享的 SQLite 文件 -> 现场生成（并写回两层缓存）。
+    """
+
+    def __init__(self, path: Optional[str] = LEVEL_STORE_PATH, maxsize: int = LEVEL_CACHE_SIZE,
+                 pack_path: Optional[str] = LEVEL_PACK):
+        self._memory = LRUCache(maxsize=maxsize)
+        self._disk = DiskStore(path, "levels") if path else None
+        self._pack: Dict[str, List[Dict[str, Any]]] = {}
+        if pack_path:
+            self.load_pack(pack_path)
+
+    def load_pack(self, pack_path: str) -> int:
+        """
+        加载关卡包，返回关卡总数。关卡包里的第 i 个关卡对应编号 i（从 1 开始）。
+        关卡带有难度评分（build_levels.py --score）时一并返回给前端；
+        预先算好的布局（build_levels.py --layout）供 layout() 直接使用。
+        """
+        self._pack = {
+            difficulty: [
+                {k: level[k] for k in ("nodes", "edges", "rating", "layout") if k in level} for level in items
+            ]
+            for difficulty, items in load_pack(pack_path).items()
+        }
+        return sum(len(items) for items in self._pack.values())
+
+    @staticmethod
+    def _key(difficulty: str, index: int) -> str:
+        return f"v{LEVEL_VERSION}:{difficulty}:{index}"
+
+    def lookup(self, difficulty: str, index: int) -> Optional[Dict[str, Any]]:
+        """只查关卡包与缓存，不生成；找不到返回 None。"""
+        packed = self._pack.get(difficulty)
+        if packed and 1 <= index <= len(packed):
+            return packed[index - 1]
+        key = self._key(difficulty, index)
+        level = self._memory.get(key)
+        if level is None and self._persist(difficulty):
+            level = self._disk.get(key)
+            if level is not None:
+                self._memory.set(key, level)
+        return level
+
+    def put(self, difficulty: str, index: int, level: Dict[str, Any]) -> None:
+        """写回两层缓存（批量接口在子进程里生成关卡后调用）。"""
+        key = self._key(difficulty, index)
+        if self._persist(difficulty):
+            self._disk.put(key, level)
+        self._memory.set(key, level)
+
+    def _persist(self, difficulty: str) -> bool:
+        # 未知难度也能生成，但不落盘，避免任意字符串把文件撑大
+        return self._disk is not None and difficulty in DIFFICULTY_SETTINGS
+
+    def get(self, difficulty: str, index: int) -> Dict[str, Any]:
+        level = self.lookup(difficulty, index)
+        if level is None:
+            level = build_level(difficulty, index)
+            self.put(difficulty, index, level)
+        return level
+
+    def layout(self, difficulty: str, index: int) -> List[List[float]]:
+        """
+        关卡的归一化顶点坐标（与 nodes 一一对应），每关只算一次，
+        与关卡存在同一套缓存里（键加 :layout 后缀）；关卡包里已有布局时直接返回。
+        """
+        level = self.get(difficulty, index)
+        if "layout" in level:
+            return level["layout"]
+        key = self._key(difficulty, index) + ":layout"
+        positions = self._memory.get(key)
+        if positions is None and self._persist(difficulty):
+            positions = self._disk.get(key)
+        if positions is None:
+            # 按需导入：布局依赖 numpy，不请求坐标的进程不必在启动时付这份导入开销
+            from algorithms.layout import compute_layout
+
+            positions = compute_layout(level["nodes"], level["edges"], seed=index)
+            if self._persist(difficulty):
+                self._disk.put(key, positions)
+        self._memory.set(key, positions)
+        return positions
+
+    def prewarm(self, indices: Iterable[int], difficulties: Iterable[str] = tuple(DIFFICULTY_SETTINGS)) -> int:
+        """预先生成一批关卡，返回成功的关卡数；个别关卡生成失败不影响启动。"""
+        count = 0
+        for difficulty in difficulties:
+            for index in indices:
+                try:
+                    self.get(difficulty, index)
+                except Exception as e:
+                    print(f"Prewarm failed for {difficulty} #{index}: {e!r}")
+                    continue
+                count += 1
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        return self._memory.stats()
+
+
+def build_level(difficulty: str, index: int) -> Dict[str, Any]:
+    """生成一个关卡并转成可 JSON 序列化的形式。"""
+    graph = generate_level(difficulty, index)
+    return {"nodes": list(graph["nodes"]), "edges": [list(e) for e in graph["edges"]]}
+
+
+def parse_index_range(spec: str) -> range:
+    """把 '1-100' 或 '50' 这样的字符串解析为关卡编号区间（闭区间）。"""
+    spec = spec.strip()
+    if not spec:
+        return range(0)
+    if "-" in spec:
+        start, end = spec.split("-", 1)
+        return range(int(start), int(end) + 1)
+    return range(1, int(spec) + 1)
@@ -1,65 +1,190 @@
+import asyncio
+import json
 import os
-import base64
-from typing import Optional, Dict, Any
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from services.metrics import count_event, observe_phase, timed
 
 # 可替换为 Azure OpenAI，或其它具备视觉理解能力的模型客户端
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# 兼容 OpenAI 协议的其它服务（或本地桩服务器）的地址，例如 http://127.0.0.1:9000/v1
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")  # 可换 gpt-4o / gpt-4.1 等具备视觉能力的模型
+# 一次讲解的总时限（秒，含排队等待并发名额），到点立即退回本地讲解
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "8"))
+# 同时进行中的模型调用上限，超出的请求排队（排队时间也计入时限）
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+SYSTEM_PROMPT = (
+    "输出简洁的中文说明：\n"
+    "1) 当前端点与其可走的边有哪些；\n"
+    "2) 推荐下一步及理由（如保持未走边连通、防止卡死）；\n"
+    "3) 若已无路或已完成，说明原因。"
+)
+
+_client = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def llm_enabled() -> bool:
+    return bool(OPENAI_API_KEY)
+
+
+def _get_client():
+    """整个进程共用一个 AsyncOpenAI 客户端，也就共用一个 HTTP 连接池；不自动重试，时限由调用方控制。"""
+    global _client
+    if _client is None:
+        from openai import AsyncOpenAI
+
+        _client = AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, max_retries=0, timeout=LLM_DEADLINE)
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # 在事件循环里第一次用到时才创建（Python 3.9 的 Semaphore 创建时就绑定当前事件循环）
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def close_client() -> None:
+    """关闭连接池（应用退出时调用）。"""
+    global _client, _semaphore
+    client, _client, _semaphore = _client, None, None
+    if client is not None:
+        await client.close()
+
+
+def _messages(image_b64: Optional[str], state: Dict[str, Any], suggested_move: Optional[list]) -> List[Dict]:
+    parts = []
+    # 结构化状态优先，减少识别误差
+    parts.append(
+        {
+            "type": "text",
+            "text": (
+                "你是一名益智游戏讲解助手。游戏是“一笔画/欧拉路径”。"
+                "请基于提供的结构化状态，先判断下一步可行走的边，并给出简洁讲解。"
+                "如果附带了截图，仅用于辅助核对，不要仅凭截图推断错误信息。\n\n"
+                f"结构化状态(JSON):\n{json.dumps(state, ensure_ascii=False)}\n\n"
+                f"算法建议的下一步(若有): {suggested_move}"
+            ),
+        }
+    )
+    if image_b64:
+        parts.append(
+            {
+                "type": "image_url",
+                "image_url": {"url": f"data:image/png;base64,{image_b64}"},
+            }
+        )
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": parts}]
+
+
+async def _complete(image_b64: Optional[str], state: Dict[str, Any], suggested_move: Optional[list]) -> str:
+    async with _get_semaphore():
+        resp = await _get_client().chat.completions.create(
+            model=LLM_MODEL, temperature=0.2, messages=_messages(image_b64, state, suggested_move),
+        )
+    return resp.choices[0].message.content.strip()
 
 
-def explain_with_llm(
-    image_b64: Optional[str], state: Dict[str, Any], suggested_move: Optional[list]
+@timed("llm")
+async def explain_with_llm(
+    image_b64: Optional[str], state: Dict[str, Any], suggested_move: Optional[list], deadline: Optional[float] = None
 ) -> Optional[str]:
     """
     使用视觉大模型生成自然语言讲解。
-    若未配置 OPENAI_API_KEY 则返回 None。
+    未配置 OPENAI_API_KEY、deadline 秒内没有完成（含排队）或调用失败时返回 None，
+    由上层退回到本地讲解；超时的请求会被取消，不会继续占着连接和并发名额。deadline 默认取 LLM_DEADLINE。
     """
     if not OPENAI_API_KEY:
         return None
-
     try:
-        from openai import OpenAI
+        return await asyncio.wait_for(_complete(image_b64, state, suggested_move), deadline or LLM_DEADLINE)
+    except asyncio.TimeoutError:
+        count_event("llm_timeout")
+    except Exception:
+        count_event("llm_error")
+    return None
 
-        client = OpenAI(api_key=OPENAI_API_KEY)
 
-        parts = []
-        # 结构化状态优先，减少识别误差
-        parts.append(
-            {
-                "type": "text",
-                "text": (
-                    "你是一名益智游戏讲解助手。游戏是“一笔画/欧拉路径”。"
-                    "请基于提供的结构化状态，先判断下一步可行走的边，并给出简洁讲解。"
-                    "如果附带了截图，仅用于辅助核对，不要仅凭截图推断错误信息。\n\n"
-                    f"结构化状态(JSON):\n{state}\n\n"
-                    f"算法建议的下一步(若有): {suggested_move}"
-                ),
-            }
-        )
-        if image_b64:
-            parts.append(
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/png;base64,{image_b64}"},
-                }
-            )
-
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",  # 可换 gpt-4o / gpt-4.1 等具备视觉能力的模型
-            temperature=0.2,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "输出简洁的中文说明：\n"
-                        "1) 当前端点与其可走的边有哪些；\n"
-                        "2) 推荐下一步及理由（如保持未走边连通、防止卡死）；\n"
-                        "3) 若已无路或已完成，说明原因。"
-                    ),
-                },
-                {"role": "user", "content": parts},
-            ],
+async def stream_with_llm(
+    image_b64: Optional[str], state: Dict[str, Any], suggested_move: Optional[list], deadline: Optional[float] = None,
+    on_complete: Optional[Callable[[str], Any]] = None,
+) -> AsyncIterator[str]:
+    """
+    流式版本：逐段产出模型输出的文字。到达 deadline 或调用失败时直接结束，
+    调用方据此判断是否要退回本地讲解（一个字都没收到时）。
+    完整收到答案（没有超时、没有出错）时以全文调用 on_complete，便于缓存。
+    """
+    if not OPENAI_API_KEY:
+        return
+    loop = asyncio.get_running_loop()
+    end = loop.time() + (deadline or LLM_DEADLINE)
+    semaphore = _get_semaphore()
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(semaphore.acquire(), max(end - loop.time(), 0))
+    except asyncio.TimeoutError:
+        count_event("llm_timeout")
+        return
+    stream = None
+    try:
+        stream = await asyncio.wait_for(
+            _get_client().chat.completions.create(
+                model=LLM_MODEL, temperature=0.2, messages=_messages(image_b64, state, suggested_move), stream=True,
+            ),
+            max(end - loop.time(), 0),
         )
-        return resp.choices[0].message.content.strip()
-    except Exception as e:
-        # 失败则交给上层退回到本地讲解
-        return None
+        chunks = stream.__aiter__()
+        parts = []
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), max(end - loop.time(), 0))
+            except StopAsyncIteration:
+                break
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+        if on_complete is not None and parts:
+            on_complete("".join(parts).strip())
+    except asyncio.TimeoutError:
+        count_event("llm_timeout")
+    except Exception:
+        count_event("llm_error")
+    finally:
+        semaphore.release()
+        if stream is not None:
+            await stream.close()
+        observe_phase("llm", time.perf_counter() - start)
+
+
+def _edge_list(moves: List[List[int]]) -> str:
+    return "、".join(f"{a}-{b}" for a, b in moves)
+
+
+def explain_locally(classification: Optional[Dict], message: Optional[str], move: Optional[list]) -> str:
+    """不依赖模型的讲解：直接复述提示算法的分类结果（safe / bridge / dead_end）。"""
+    if classification is None:
+        return message or "无法给出下一步"
+    lines = [f"当前端点是 {classification['from']}。"]
+    if classification["safe"]:
+        lines.append(f"可以放心走的边：{_edge_list(classification['safe'])}。")
+    if classification["bridge"]:
+        lines.append(f"桥（走过去就回不来）：{_edge_list(classification['bridge'])}。")
+    if classification["dead_end"]:
+        lines.append(f"会把剩下的边困住的走法：{_edge_list(classification['dead_end'])}。")
+    if move is None:
+        lines.append("已经没有可走的边了。")
+    else:
+        step = f"{move[0]}-{move[1]}"
+        if list(move) in [list(m) for m in classification["safe"]]:
+            lines.append(f"推荐走 {step}：走完后剩下的边仍然连成一片，不会卡死。")
+        elif list(move) in [list(m) for m in classification["bridge"]]:
+            lines.append(f"推荐走 {step}：这是唯一的出路，只能现在走过这座桥。")
+        else:
+            lines.append(f"只剩 {step} 可走，但之后会有边走不到，建议撤销几步换条路线。")
+    return "".join(lines)
@@ -0,0 +1,224 @@
+"""
+进程内指标，以 Prometheus 文本格式从 /metrics 导出（不依赖 prometheus_client）。
+
+    @timed("euler")                 # 内部阶段耗时 -> phase_duration_seconds{phase="euler"}
+    def euler_path_ids(graph): ...
+
+    observe_size("/solve", len(nodes), len(edges))   # 请求规模 -> request_nodes / request_edges
+
+METRICS_ENABLED=0 时 timed 直接返回原函数、middleware 不挂载、observe_* 立即返回，
+关闭后的开销为零或一次空函数调用（远低于 1 微秒），因此默认开启，可以长期留在生产环境里排查长尾延迟。
+每个进程各有一份指标：交给进程池（services/workers.offload）的任务在子进程里记录的阶段耗时不会出现在这里，
+父进程只记录整个 offload 的等待时间。
+"""
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# 路由延迟与内部阶段共用一组桶：100µs ~ 10s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (10, 30, 100, 300, 1_000, 3_000, 10_000, 30_000, 100_000, 300_000, 1_000_000)
+_INF = 'le="+Inf"'
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    """带标签的累积直方图。observe 只做一次二分查找和加锁计数。"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # 标签值 -> [各桶计数（非累积，最后一格是 +Inf）, 总和]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in sorted(snapshot):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_number(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            cumulative += counts[-1]
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, _INF)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Counter:
+    """带标签的单调计数器。"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for labels, value in snapshot:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+
+
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "按路由统计的请求耗时（到响应体发送完毕）",
+                             ("method", "route", "status"))
+PHASE_DURATION = Histogram("phase_duration_seconds", "请求内部各阶段的耗时", ("phase",))
+REQUEST_NODES = Histogram("request_nodes", "请求中图的顶点数", ("route",), SIZE_BUCKETS)
+REQUEST_EDGES = Histogram("request_edges", "请求中图的边数", ("route",), SIZE_BUCKETS)
+EVENTS = Counter("events_total", "值得关注的事件次数（过载拒绝、关卡数据错误等）", ("event",))
+
+_METRICS = [REQUEST_DURATION, PHASE_DURATION, REQUEST_NODES, REQUEST_EDGES, EVENTS]
+# 抓取时才调用的缓存统计：名字 -> 返回 LRUCache.stats() 形式字典的函数
+_CACHE_SOURCES: Dict[str, Callable[[], Dict]] = {}
+
+
+def timed(phase: str) -> Callable[[Callable], Callable]:
+    """
+    装饰器：把函数每次调用的耗时记到 phase_duration_seconds{phase=...}，协程函数计到 await 结束。
+    指标关闭时原样返回被装饰的函数，没有任何额外开销。
+    """
+    def decorate(fn: Callable) -> Callable:
+        if not METRICS_ENABLED:
+            return fn
+
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    PHASE_DURATION.observe(time.perf_counter() - start, phase)
+
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                PHASE_DURATION.observe(time.perf_counter() - start, phase)
+
+        return wrapper
+
+    return decorate
+
+
+def observe_phase(phase: str, seconds: float) -> None:
+    """手动记录一段阶段耗时（不方便拆成函数的代码段用）。"""
+    if METRICS_ENABLED:
+        PHASE_DURATION.observe(seconds, phase)
+
+
+def observe_size(route: str, nodes: int, edges: int) -> None:
+    if METRICS_ENABLED:
+        REQUEST_NODES.observe(nodes, route)
+        REQUEST_EDGES.observe(edges, route)
+
+
+def count_event(event: str) -> None:
+    if METRICS_ENABLED:
+        EVENTS.inc(event)
+
+
+def register_cache(name: str, stats: Callable[[], Dict]) -> None:
+    """登记一个缓存的统计函数，/metrics 抓取时导出它的命中 / 未命中次数、命中率和条目数。"""
+    _CACHE_SOURCES[name] = stats
+
+
+def _render_caches() -> Iterable[str]:
+    rows = [(name, stats()) for name, stats in sorted(_CACHE_SOURCES.items())]
+    for metric, key, kind, help in (
+        ("cache_hits_total", "hits", "counter", "缓存命中次数"),
+        ("cache_misses_total", "misses", "counter", "缓存未命中次数"),
+        ("cache_hit_ratio", "hit_ratio", "gauge", "缓存命中率"),
+        ("cache_entries", "size", "gauge", "缓存当前条目数"),
+    ):
+        yield f"# HELP {metric} {help}"
+        yield f"# TYPE {metric} {kind}"
+        for name, stats in rows:
+            yield f'{metric}{{cache="{name}"}} {_format_number(stats.get(key, 0))}'
+
+
+def render_metrics() -> str:
+    """所有指标的 Prometheus 文本格式（version 0.0.4）。"""
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    lines.extend(_render_caches())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    纯 ASGI 中间件，按 (方法, 路由模板, 状态码) 记录 HTTP 请求耗时。
+    用路由模板（/session/{session_id}/move）而不是实际路径作标签，避免标签数量无限增长；
+    流式响应计到最后一块发送完毕为止。WebSocket 与 lifespan 直接放行。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_DURATION.observe(time.perf_counter() - start, scope["method"], path, str(status[0]))
@@ -0,0 +1,45 @@
+import os
+import threading
+import uuid
+from typing import List, Optional, Tuple
+
+from algorithms.euler import GameState
+from services.cache import LRUCache
+
+# 会话上限与空闲过期时间（秒），可通过环境变量调整
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "10000"))
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))
+
+
+class Session:
+    """一个会话 = 一局游戏的增量状态 + 一把锁（同一会话的请求可能并发到达）。"""
+
+    __slots__ = ("id", "state", "lock")
+
+    def __init__(self, session_id: str, state: GameState):
+        self.id = session_id
+        self.state = state
+        self.lock = threading.Lock()
+
+
+class SessionStore:
+    """
+    内存中的会话存储：有界 LRU + 空闲 TTL，超出容量或长时间不活跃的会话会被淘汰。
+    """
+
+    def __init__(self, maxsize: int = SESSION_MAX_COUNT, ttl: float = SESSION_TTL):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl, sliding=True)
+
+    def create(self, nodes: List[int], edges: List[Tuple[int, int]]) -> Session:
+        session = Session(uuid.uuid4().hex, GameState(nodes, edges))
+        self._cache.set(session.id, session)
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self._cache.get(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        return self._cache.pop(session_id) is not None
+
+    def stats(self):
+        return self._cache.stats()
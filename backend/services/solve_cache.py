@@ -0,0 +1,134 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from algorithms.euler import find_euler_path, find_euler_path_flat, find_min_strokes, find_min_strokes_flat
+from algorithms.fingerprint import graph_fingerprint
+from algorithms.postman import chinese_postman
+from services.cache import LRUCache
+from services.disk_store import DiskStore
+from services.level_store import LEVEL_STORE_PATH
+from services.workers import OFFLOAD_MIN_EDGES, offload
+
+# 求解结果与关卡共用一个 SQLite 文件（不同的表），设为空字符串则只用内存缓存
+SOLVE_STORE_PATH = os.getenv("SOLVE_STORE_PATH", LEVEL_STORE_PATH)
+SOLVE_CACHE_SIZE = int(os.getenv("SOLVE_CACHE_SIZE", "4096"))
+# 用户可以提交任意的图，落盘的结果必须有上限：最多保留这么多行（先写先淘汰），
+# 解的长度（路径顶点数 / 各笔画顶点数之和）超过 SOLVE_STORE_MAX_LENGTH 的只留在进程内 LRU
+SOLVE_STORE_MAX_ROWS = int(os.getenv("SOLVE_STORE_MAX_ROWS", "100000"))
+SOLVE_STORE_MAX_LENGTH = int(os.getenv("SOLVE_STORE_MAX_LENGTH", "20000"))
+# 求解器输出格式变化时递增，旧的缓存结果与 ETag 随之失效
+SOLVER_VERSION = 1
+# /solve 支持的求解模式：euler 一笔画路径，postman 中国邮递员路线（允许重走边），strokes 最少笔画分解
+SOLVE_MODES = ("euler", "postman", "strokes")
+
+
+def compute_entry(nodes: List[int], edges: Optional[List[Tuple[int, int]]], flat_edges: Optional[Sequence[int]],
+                  mode: str, closed: bool) -> Dict[str, Any]:
+    """按模式求解并生成缓存项；大图会在进程池里调用，必须是模块级函数。"""
+    if mode == "postman":
+        if edges is None:
+            edges = list(zip(flat_edges[0::2], flat_edges[1::2]))
+        return chinese_postman(nodes, edges, closed) or {"path": None}
+    if mode == "strokes":
+        if flat_edges is not None:
+            return {"strokes": find_min_strokes_flat(nodes, flat_edges)}
+        return {"strokes": find_min_strokes(nodes, edges)}
+    if flat_edges is not None:
+        return {"path": find_euler_path_flat(nodes, flat_edges)}
+    return {"path": find_euler_path(nodes, edges)}
+
+
+def solve_key(nodes: List[int], edges: Optional[Iterable[Tuple[int, int]]], flat_edges: Optional[Sequence[int]],
+              mode: str, closed: bool) -> str:
+    """缓存键 = 求解器版本 + 模式 + 图指纹；大图会在进程池里调用，必须是模块级函数。"""
+    if edges is None:
+        edges = zip(flat_edges[0::2], flat_edges[1::2])
+    fingerprint = graph_fingerprint(nodes, edges)
+    if mode == "euler":
+        return f"v{SOLVER_VERSION}:{fingerprint}"
+    return f"v{SOLVER_VERSION}:{mode}{'-closed' if closed else ''}:{fingerprint}"
+
+
+def flatten_for_offload(edges: Optional[List[Tuple[int, int]]], flat_edges: Optional[Sequence[int]]) -> List[int]:
+    """
+    交给进程池前把边转成扁平的 int 列表：序列化 10^6 条边时比 [u, v] 列表快近 10 倍；
+    请求体上的视图（memoryview）不能跨进程传递，也在这里复制出来。
+    """
+    if flat_edges is None:
+        return [x for edge in edges for x in edge]
+    if isinstance(flat_edges, memoryview):
+        return flat_edges.tolist()
+    return flat_edges
+
+
+class SolveCache:
+    """
+    以图的规范指纹为键缓存 /solve 的结果（内容寻址）：
+    进程内 LRU -> 多 worker 共享的 SQLite 表（有行数上限，大图的解不落盘）-> find_euler_path / chinese_postman。
+    同一张图无论顶点、边的书写顺序如何都命中同一条记录，返回的路径对它都有效。
+    缓存项是 {"path": ...}，postman 模式另有 "retraced"、"closed"，strokes 模式是 {"strokes": [...]}；
+    不同模式的键互不相同。
+    """
+
+    def __init__(self, path: Optional[str] = SOLVE_STORE_PATH, maxsize: int = SOLVE_CACHE_SIZE):
+        self._memory = LRUCache(maxsize=maxsize)
+        self._disk = DiskStore(path, "solutions", max_rows=SOLVE_STORE_MAX_ROWS) if path else None
+        self.disk_hits = 0
+
+    @staticmethod
+    def key(nodes: List[int], edges: Optional[List[Tuple[int, int]]], mode: str = "euler", closed: bool = False,
+            flat_edges: Optional[Sequence[int]] = None) -> str:
+        """
+        缓存键。指纹要排序、拼接整个边多重集合（10^6 条边要好几秒），边数达到 OFFLOAD_MIN_EDGES 时
+        和求解一样交给进程池，不在本进程里占着 GIL；大图的边先转成扁平的 int 列表再传（序列化快得多）。
+        """
+        size = len(flat_edges) // 2 if flat_edges is not None else len(edges)
+        if size >= OFFLOAD_MIN_EDGES:
+            flat_edges = flatten_for_offload(edges, flat_edges)
+            edges = None
+        return offload(solve_key, nodes, edges, flat_edges, mode, closed, size=size)
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """只查缓存：命中返回 {"path": 路径或 None}，未命中返回 None。"""
+        entry = self._memory.get(key)
+        if entry is None and self._disk is not None:
+            entry = self._disk.get(key)
+            if entry is not None:
+                self.disk_hits += 1
+                self._memory.set(key, entry)
+        return entry
+
+    def put(self, key: str, path: Optional[List[int]]) -> None:
+        self._store(key, {"path": path})
+
+    @staticmethod
+    def _length(entry: Dict[str, Any]) -> int:
+        return len(entry.get("path") or ()) + sum(len(stroke) for stroke in entry.get("strokes", ()))
+
+    def _store(self, key: str, entry: Dict[str, Any]) -> None:
+        if self._disk is not None and self._length(entry) <= SOLVE_STORE_MAX_LENGTH:
+            self._disk.put(key, entry)
+        self._memory.set(key, entry)
+
+    def solve(self, nodes: List[int], edges: List[Tuple[int, int]], key: Optional[str] = None,
+              flat_edges: Optional[Sequence[int]] = None, mode: str = "euler",
+              closed: bool = False) -> Tuple[str, Dict[str, Any]]:
+        """
+        返回 (缓存键, 缓存项)；无解时缓存项里的路径为 None（同样会被缓存），strokes 模式总是有解。
+        给出 flat_edges（扁平端点序列，如二进制请求体）时直接用它求解。
+        大图交给进程池（services/workers.offload），排满或超时抛出 Overloaded。
+        """
+        key = key or self.key(nodes, edges, mode, closed, flat_edges)
+        entry = self.lookup(key)
+        if entry is None:
+            size = len(flat_edges) // 2 if flat_edges is not None else len(edges)
+            if size >= OFFLOAD_MIN_EDGES:
+                flat_edges = flatten_for_offload(edges, flat_edges)
+            entry = offload(compute_entry, nodes, edges, flat_edges, mode, closed, size=size)
+            self._store(key, entry)
+        return key, entry
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._memory.stats()
+        stats["disk_hits"] = self.disk_hits
+        return stats
@@ -0,0 +1,104 @@
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from algorithms.euler import find_euler_path
+from algorithms.fingerprint import FINGERPRINT_CACHE_MAX_EDGES, request_fingerprint
+from services.cache import LRUCache
+from services.workers import offload
+
+TRAIL_CACHE_SIZE = int(os.getenv("TRAIL_CACHE_SIZE", "4096"))
+
+
+def _key(a: int, b: int) -> Tuple[int, int]:
+    return (a, b) if a < b else (b, a)
+
+
+class ReferenceTrail:
+    """
+    一条预先算好的欧拉路径，用来直接回答“沿着这条路走的玩家下一步该走哪”。
+    闭合回路可以从任意位置、沿任意方向走；开放路径只能从两端之一出发。
+    """
+
+    __slots__ = ("path", "closed", "keys", "positions")
+
+    def __init__(self, path: List[int]):
+        self.path = path
+        self.closed = len(path) > 1 and path[0] == path[-1]
+        self.keys = [_key(path[i], path[i + 1]) for i in range(len(path) - 1)]
+        # 边 -> 它在路径里出现的位置（重复边会有多个）
+        self.positions: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, key in enumerate(self.keys):
+            self.positions[key].append(i)
+
+    def _offsets(self, first: Optional[Tuple[int, int]], endpoint: Optional[int]):
+        """列出可能的 (起始边下标, 方向)；方向 1 为正走，-1 为反走。"""
+        E = len(self.keys)
+        if not self.closed:
+            return ((0, 1), (E - 1, -1))
+        if first is not None:
+            starts = self.positions.get(first, ())
+        else:
+            # 还没走：从端点出发的任意一条路径边都可以
+            starts = [i for i, key in enumerate(self.keys) if endpoint is None or endpoint in key]
+        return [(j, d) for j in starts for d in (1, -1)]
+
+    def next_move(self, visited: Sequence[Tuple[int, int]], endpoint: Optional[int]) -> Optional[Tuple[int, int]]:
+        """
+        visited 是玩家按顺序走过的边，与这条路径的某个走法前缀一致时返回下一步 (from, to)，
+        否则返回 None（玩家已偏离，交给桥检测处理）。
+        """
+        path, keys = self.path, self.keys
+        E = len(keys)
+        k = len(visited)
+        if k >= E:
+            return None
+        first = visited[0] if visited else None
+        for j, d in self._offsets(first, endpoint):
+            if all(keys[(j + d * t) % E] == visited[t] for t in range(k)):
+                # 正走时第 t 步从 path[j + t] 出发，反走时从 path[j + 1 - t] 出发
+                if d == 1:
+                    here, there = path[(j + k) % E], path[(j + k) % E + 1]
+                else:
+                    i = (j - k) % E
+                    here, there = path[i + 1], path[i]
+                if (endpoint is None and k == 0) or endpoint == here:
+                    return here, there
+        return None
+
+
+class TrailCache:
+    """
+    按图的规范指纹缓存参考路径（LRU），热门关卡被反复游玩时几乎不需要重新计算。
+    不可一笔画的图也会缓存（记为 None），避免重复求解。
+    """
+
+    _UNSOLVABLE = ()
+
+    def __init__(self, maxsize: int = TRAIL_CACHE_SIZE):
+        self._cache = LRUCache(maxsize=maxsize)
+
+    def get(self, nodes: List[int], edges: List[Tuple[int, int]]) -> Optional[ReferenceTrail]:
+        key = request_fingerprint(nodes, edges)
+        trail = self._cache.get(key)
+        if trail is None:
+            path = offload(find_euler_path, nodes, edges, size=len(edges))
+            trail = ReferenceTrail(path) if path else self._UNSOLVABLE
+            self._cache.set(key, trail)
+        return trail or None
+
+    def next_move_pairs(self, nodes: List[int], edges: List[Tuple[int, int]],
+                        visited: Iterable[Tuple[int, int]], pathEndpoint: Optional[int]) -> Optional[Tuple[int, int]]:
+        """
+        玩家一直沿参考路径（或其反向 / 回路的旋转）行走时直接给出下一步，否则返回 None。
+        指纹不缓存的大图直接返回 None：每次都要在请求线程里重算指纹，不如交给进程池做桥检测。
+        """
+        if len(edges) > FINGERPRINT_CACHE_MAX_EDGES:
+            return None
+        trail = self.get(nodes, edges)
+        if trail is None:
+            return None
+        return trail.next_move([_key(a, b) for a, b in visited], pathEndpoint)
+
+    def stats(self):
+        return self._cache.stats()
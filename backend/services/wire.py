@@ -0,0 +1,148 @@
+import sys
+from array import array
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request
+
+# 紧凑二进制格式：整段都是小端 int32，没有任何分隔符
+#   图      [N, E, 顶点 * N, (u, v) * E]
+#   提示    [N, E, V, 有无端点, 端点, detail, 顶点 * N, (u, v) * E, (a, b) * V]   V 为走过的边数
+#   路径    [L, 顶点 * L]
+#   多笔画  [S, (L, 顶点 * L) * S]   S 为笔画数
+#   一步    [from, to]
+#   校验    [N, E, 顶点 * N, (u, v) * E, 路径顶点...]   按关卡校验时只有路径顶点；路径长度不用提前给出
+# 请求用 Content-Type、响应用 Accept 协商；默认仍是 JSON，出错时也总是返回 JSON。
+WIRE_MEDIA_TYPE = "application/x-one-stroke"
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _ints(body: bytes) -> memoryview:
+    """把请求体看成 int32 序列。小端机器上是零拷贝的 memoryview，否则先复制并翻转字节序。"""
+    if len(body) % 4:
+        raise HTTPException(status_code=400, detail="二进制请求体长度必须是 4 的倍数")
+    if _LITTLE_ENDIAN:
+        return memoryview(body).cast("i")
+    values = array("i")
+    values.frombytes(body)
+    values.byteswap()
+    return memoryview(values)
+
+
+def _encode(values: Sequence[int]) -> bytes:
+    data = array("i", values)
+    if not _LITTLE_ENDIAN:
+        data.byteswap()
+    return data.tobytes()
+
+
+class WireGraph:
+    """
+    二进制请求解出的图：nodes 为列表，flat 为边端点的扁平视图（直接指向请求体，不复制）。
+    edges 在第一次访问时才物化成 (u, v) 列表（算指纹、回退到 JSON 逻辑时才需要）。
+    """
+
+    __slots__ = ("nodes", "flat", "_edges")
+
+    def __init__(self, nodes: List[int], flat: Sequence[int]):
+        self.nodes = nodes
+        self.flat = flat
+        self._edges: Optional[List[Tuple[int, int]]] = None
+
+    def pairs(self):
+        """按 (u, v) 逐条产出边，不物化列表。"""
+        return zip(self.flat[0::2], self.flat[1::2])
+
+    @property
+    def edges(self) -> List[Tuple[int, int]]:
+        if self._edges is None:
+            self._edges = list(self.pairs())
+        return self._edges
+
+
+class WireHint(WireGraph):
+    __slots__ = ("visited", "pathEndpoint", "detail")
+
+    def __init__(self, nodes: List[int], flat: Sequence[int], visited: Sequence[int],
+                 pathEndpoint: Optional[int], detail: bool):
+        super().__init__(nodes, flat)
+        self.visited = visited
+        self.pathEndpoint = pathEndpoint
+        self.detail = detail
+
+    def visited_pairs(self):
+        return zip(self.visited[0::2], self.visited[1::2])
+
+
+def _check_length(ints: memoryview, counts: Sequence[int], expected: int) -> None:
+    if min(counts) < 0 or len(ints) != expected:
+        raise HTTPException(status_code=400, detail="二进制请求体长度与头部不符")
+
+
+def decode_graph(body: bytes) -> WireGraph:
+    ints = _ints(body)
+    if len(ints) < 2:
+        raise HTTPException(status_code=400, detail="二进制请求体缺少头部")
+    n, e = ints[0], ints[1]
+    _check_length(ints, (n, e), 2 + n + 2 * e)
+    return WireGraph(ints[2:2 + n].tolist(), ints[2 + n:])
+
+
+def decode_hint(body: bytes) -> WireHint:
+    ints = _ints(body)
+    if len(ints) < 6:
+        raise HTTPException(status_code=400, detail="二进制请求体缺少头部")
+    n, e, v, has_endpoint, endpoint, detail = ints[:6].tolist()
+    _check_length(ints, (n, e, v), 6 + n + 2 * e + 2 * v)
+    edges_at = 6 + n
+    visited_at = edges_at + 2 * e
+    return WireHint(
+        ints[6:edges_at].tolist(),
+        ints[edges_at:visited_at],
+        ints[visited_at:],
+        endpoint if has_endpoint else None,
+        bool(detail),
+    )
+
+
+async def stream_ints(request: Request) -> AsyncIterator[memoryview]:
+    """边接收边把请求体解成 int32 序列，每到一块产出一段；块边界不必对齐 4 字节。"""
+    rest = b""
+    async for chunk in request.stream():
+        if rest:
+            chunk = rest + chunk
+        usable = len(chunk) - len(chunk) % 4
+        rest = chunk[usable:]
+        if usable:
+            yield _ints(chunk[:usable])
+    if rest:
+        raise HTTPException(status_code=400, detail="二进制请求体长度必须是 4 的倍数")
+
+
+def encode_graph(nodes: Sequence[int], edges: Sequence[Sequence[int]]) -> bytes:
+    return _encode([len(nodes), len(edges), *nodes, *(x for edge in edges for x in edge)])
+
+
+def encode_path(path: Sequence[int]) -> bytes:
+    return _encode([len(path), *path])
+
+
+def encode_strokes(strokes: Sequence[Sequence[int]]) -> bytes:
+    values = [len(strokes)]
+    for stroke in strokes:
+        values.append(len(stroke))
+        values.extend(stroke)
+    return _encode(values)
+
+
+def encode_move(move: Sequence[int]) -> bytes:
+    return _encode(move)
+
+
+def is_wire_body(request: Request) -> bool:
+    return request.headers.get("content-type", "").split(";")[0].strip() == WIRE_MEDIA_TYPE
+
+
+def wants_wire(request: Request) -> bool:
+    """依赖项：客户端在 Accept 里要了二进制格式时为真。"""
+    return WIRE_MEDIA_TYPE in request.headers.get("accept", "")
@@ -0,0 +1,169 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from algorithms.euler import find_euler_path
+from services.level_store import build_level
+from services.metrics import count_event, observe_phase
+
+# 批量接口的进程池：进程数、每个任务块的大小、多少个以内直接在当前线程里算。
+# 每个 web worker 各有一个进程池，默认把 CPU 平分给 WEB_CONCURRENCY 个 web worker（至少 1 个），
+# 整台机器的求解进程数不超过 CPU 核数
+WEB_CONCURRENCY = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(max((os.cpu_count() or 1) // WEB_CONCURRENCY, 1))))
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "16"))
+BATCH_INLINE_MAX = int(os.getenv("BATCH_INLINE_MAX", "32"))
+
+# 单个大请求的分流：边数达到 OFFLOAD_MIN_EDGES 才交给进程池，小图仍在当前线程里算；
+# 同时交给进程池的请求最多 OFFLOAD_MAX_PENDING 个（含排队），再多直接返回 503；
+# 每个请求最多等 OFFLOAD_TIMEOUT 秒
+OFFLOAD_MIN_EDGES = int(os.getenv("OFFLOAD_MIN_EDGES", "5000"))
+OFFLOAD_MAX_PENDING = int(os.getenv("OFFLOAD_MAX_PENDING", str(2 * BATCH_WORKERS)))
+OFFLOAD_TIMEOUT = float(os.getenv("OFFLOAD_TIMEOUT", "10"))
+OFFLOAD_RETRY_AFTER = int(os.getenv("OFFLOAD_RETRY_AFTER", "2"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+_offload_slots = threading.BoundedSemaphore(OFFLOAD_MAX_PENDING)
+
+
+class Overloaded(Exception):
+    """进程池已排满或请求超出时间预算，调用方应返回 503 并带上 Retry-After。"""
+
+    def __init__(self, message: str, retry_after: int = OFFLOAD_RETRY_AFTER):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+def _preload() -> None:
+    # 子进程启动时先导入求解模块，第一个任务不必再付导入的开销
+    import algorithms.euler  # noqa: F401
+    import algorithms.postman  # noqa: F401
+    import services.solve_cache  # noqa: F401
+
+
+def _noop() -> None:
+    pass
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    懒加载的进程池，每个 uvicorn worker 进程各有一个。
+    用 spawn 启动子进程：当前进程里有线程池在跑，fork 可能把持有中的锁一起复制过去。
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(
+                max_workers=BATCH_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_preload,
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def prestart_pool() -> None:
+    """
+    启动时先拉起全部子进程（子进程按需创建），避免第一个大请求等子进程启动。
+    只提交空任务、不等它们完成：子进程在后台导入求解模块，不拖慢本进程开始接受连接。
+    """
+    pool = get_pool()
+    for _ in range(BATCH_WORKERS):
+        pool.submit(_noop)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            # 等正在算的任务结束、子进程退出后再返回：不等的话进程退出时进程池的信号量还没释放，
+            # resource_tracker 会报告泄漏；还没开始的任务直接取消
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def _apply_chunk(fn: Callable[[Any], Any], chunk: Sequence[Any]) -> List[Any]:
+    return [fn(item) for item in chunk]
+
+
+def run_batch(fn: Callable[[Any], Any], items: Sequence[Any],
+              chunksize: int = BATCH_CHUNK_SIZE) -> Iterator[Tuple[int, Any]]:
+    """
+    对每个 item 调用 fn，按完成顺序产出 (下标, 结果)。
+    任务少时直接在当前线程里算（省去进程间传输），多时按块分给进程池。
+    fn 必须是模块级函数（需要能被 pickle）。
+    """
+    if len(items) <= BATCH_INLINE_MAX or BATCH_WORKERS <= 1:
+        for i, item in enumerate(items):
+            yield i, fn(item)
+        return
+    pool = get_pool()
+    futures = {
+        pool.submit(_apply_chunk, fn, items[start:start + chunksize]): start
+        for start in range(0, len(items), chunksize)
+    }
+    try:
+        for future in as_completed(futures):
+            start = futures[future]
+            for offset, result in enumerate(future.result()):
+                yield start + offset, result
+    finally:
+        # 客户端中途断开（流式响应被关闭）时取消还没开始的任务块
+        for future in futures:
+            future.cancel()
+
+
+def offload(fn: Callable[..., Any], *args: Any, size: int, timeout: float = OFFLOAD_TIMEOUT) -> Any:
+    """
+    按请求规模分流：size（边数）小于 OFFLOAD_MIN_EDGES 时直接调用 fn(*args)，
+    否则交给进程池并最多等待 timeout 秒，求解期间不占用本进程的 GIL。
+    进程池已满或超时抛出 Overloaded；超时的任务在子进程里仍会算完，算完前继续占着名额。
+    fn 与参数都必须能被 pickle。
+    """
+    if size < OFFLOAD_MIN_EDGES:
+        return fn(*args)
+    if not _offload_slots.acquire(blocking=False):
+        count_event("offload_rejected")
+        raise Overloaded("服务器繁忙，请稍后重试")
+    try:
+        future = get_pool().submit(fn, *args)
+    except BrokenProcessPool:
+        _offload_slots.release()
+        shutdown_pool()
+        raise Overloaded("求解进程异常退出，请稍后重试")
+    except BaseException:
+        # 例如进程池已关闭时的 RuntimeError：没提交成功，名额必须还回去
+        _offload_slots.release()
+        raise
+    future.add_done_callback(lambda _: _offload_slots.release())
+    start = time.perf_counter()
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        future.cancel()
+        count_event("offload_timeout")
+        raise Overloaded("求解超时，请稍后重试")
+    except BrokenProcessPool:
+        shutdown_pool()
+        raise Overloaded("求解进程异常退出，请稍后重试")
+    finally:
+        # 子进程里各阶段的耗时记在子进程自己的指标里，这里只记整体的排队 + 计算时间
+        observe_phase("offload", time.perf_counter() - start)
+
+
+# --- V V V --- 在子进程中运行的任务 --- V V V ---
+
+def solve_task(graph: Tuple[List[int], List[Tuple[int, int]]]) -> Optional[List[int]]:
+    nodes, edges = graph
+    return find_euler_path(nodes, edges)
+
+
+def level_task(task: Tuple[str, int]) -> dict:
+    difficulty, index = task
+    return build_level(difficulty, index)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试从 backend 目录以外运行时，也能像服务本身一样直接导入 algorithms / services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
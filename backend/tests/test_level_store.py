@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from generate_graph import DIFFICULTY_SETTINGS
+from services.level_store import LevelStore, build_level
+
+INDICES = range(1, 21)
+THREADS = 8
+
+
+def _expected():
+    return {(d, i): build_level(d, i) for d in DIFFICULTY_SETTINGS for i in INDICES}
+
+
+def _requests():
+    # 每个关卡被多个线程同时请求，且各线程的请求顺序交错
+    keys = [(d, i) for d in DIFFICULTY_SETTINGS for i in INDICES]
+    return [key for _ in range(THREADS) for key in keys]
+
+
+def test_concurrent_get_matches_single_threaded(tmp_path):
+    expected = _expected()
+    store = LevelStore(path=str(tmp_path / "levels.sqlite3"), pack_path="")
+    requests = _requests()
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(lambda key: store.get(*key), requests))
+    for key, level in zip(requests, results):
+        assert level == expected[key]
+    # 写回缓存的也是正确的结果：换一个只读磁盘的新实例再查一遍
+    fresh = LevelStore(path=str(tmp_path / "levels.sqlite3"), pack_path="")
+    for key, level in expected.items():
+        assert fresh.lookup(*key) == level
+
+
+def test_concurrent_fresh_stores_share_disk(tmp_path):
+    """模拟多个 worker：各自新建的 LevelStore 同时生成并写同一个 SQLite 文件。"""
+    expected = _expected()
+    path = str(tmp_path / "levels.sqlite3")
+
+    def run(worker):
+        store = LevelStore(path=path, pack_path="")
+        keys = list(expected)
+        # 不同 worker 从不同位置开始，制造同一关卡的并发写入
+        keys = keys[worker::2] + keys[1 - worker % 2::2]
+        return [(key, store.get(*key)) for key in keys]
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        for results in pool.map(run, range(THREADS)):
+            for key, level in results:
+                assert level == expected[key]
+
+
+def test_memory_only_store():
+    expected = _expected()
+    store = LevelStore(path="", pack_path="")
+    requests = _requests()
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(lambda key: store.get(*key), requests))
+    assert all(level == expected[key] for key, level in zip(requests, results))
@@ -0,0 +1,228 @@
+"""
+讲解客户端对着本地桩服务器（兼容 OpenAI 协议）测试：时限、并发上限、失败时退回本地讲解。
+桩服务器按 base_url 里的路径前缀决定行为：/ok 立即回答，/slow 睡过时限，/error 返回 500，/stall 流式发一段后停住。
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services import llm_client
+from services.llm_client import explain_locally, explain_with_llm, stream_with_llm
+
+ANSWER = "推荐走 1-2。"
+SLOW_SECONDS = 2.0
+
+
+class _Stub(BaseHTTPRequestHandler):
+    delay = 0.0  # /ok 的应答延迟，测并发上限时调大
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        mode = self.path.strip("/").split("/")[0]
+        try:
+            if mode == "error":
+                self._send(500, "application/json", b'{"error": {"message": "boom"}}')
+            elif mode == "slow":
+                time.sleep(SLOW_SECONDS)
+                self._answer(body)
+            elif mode == "stall":
+                self._stream(["推荐", "走"], stall=SLOW_SECONDS)
+            else:
+                self._answer_counted(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _answer_counted(self, body):
+        # 只统计 /ok 的并发（前面测试里被取消的 /slow 请求在服务端还会睡一会儿）；
+        # 先离开计数再发应答：客户端收到应答就会放出名额，下一个请求可能比这里更早到
+        with _Stub.lock:
+            _Stub.active += 1
+            _Stub.max_active = max(_Stub.max_active, _Stub.active)
+        try:
+            time.sleep(_Stub.delay)
+        finally:
+            with _Stub.lock:
+                _Stub.active -= 1
+        self._answer(body)
+
+    def _send(self, status, content_type, payload):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _answer(self, body):
+        if body.get("stream"):
+            self._stream(["推荐走 ", "1-2。"])
+            return
+        reply = {
+            "id": "stub", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER}, "finish_reason": "stop"}],
+        }
+        self._send(200, "application/json", json.dumps(reply).encode())
+
+    def _stream(self, parts, stall=0.0):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for part in parts:
+            chunk = {
+                "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+                "choices": [{"index": 0, "delta": {"content": part}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        time.sleep(stall)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def use_stub(monkeypatch, stub_url):
+    """把客户端指向桩服务器的某个模式；每个测试用新的客户端与信号量。"""
+
+    def use(mode: str, concurrency: int = 8):
+        monkeypatch.setattr(llm_client, "OPENAI_API_KEY", "test")
+        monkeypatch.setattr(llm_client, "OPENAI_BASE_URL", f"{stub_url}/{mode}/v1")
+        monkeypatch.setattr(llm_client, "LLM_MAX_CONCURRENCY", concurrency)
+        monkeypatch.setattr(llm_client, "_client", None)
+        monkeypatch.setattr(llm_client, "_semaphore", None)
+        _Stub.delay = 0.0
+        _Stub.max_active = 0
+
+    yield use
+    llm_client._client = None
+    llm_client._semaphore = None
+
+
+def _run(coro):
+    # 每次 asyncio.run 都是新的事件循环，客户端的连接池不能跨循环复用，结束时关掉
+    async def wrapped():
+        try:
+            return await coro
+        finally:
+            await llm_client.close_client()
+
+    return asyncio.run(wrapped())
+
+
+async def _collect(agen):
+    return [part async for part in agen]
+
+
+STATE = {"nodes": [1, 2, 3], "edges": [[1, 2], [2, 3], [3, 1]], "visitedEdges": [], "pathEndpoint": 1}
+
+
+def test_answer_from_model(use_stub):
+    use_stub("ok")
+    assert _run(explain_with_llm(None, STATE, [1, 2], deadline=5)) == ANSWER
+
+
+def test_deadline_returns_none_without_waiting(use_stub):
+    use_stub("slow")
+    start = time.perf_counter()
+    assert _run(explain_with_llm(None, STATE, [1, 2], deadline=0.3)) is None
+    assert time.perf_counter() - start < SLOW_SECONDS / 2
+
+
+def test_error_returns_none(use_stub):
+    use_stub("error")
+    assert _run(explain_with_llm(None, STATE, [1, 2], deadline=5)) is None
+
+
+def test_concurrency_is_bounded(use_stub):
+    use_stub("ok", concurrency=2)
+    _Stub.delay = 0.2
+
+    async def many():
+        return await asyncio.gather(*(explain_with_llm(None, STATE, [1, 2], deadline=5) for _ in range(6)))
+
+    assert _run(many()) == [ANSWER] * 6
+    assert _Stub.max_active == 2
+
+
+def test_queueing_counts_against_deadline(use_stub):
+    # 只有一个名额：第一个 0.4 秒答完，第二个拿到名额时只剩 0.2 秒，第三个一直在排队
+    use_stub("ok", concurrency=1)
+    _Stub.delay = 0.4
+
+    async def many():
+        return await asyncio.gather(*(explain_with_llm(None, STATE, [1, 2], deadline=0.6) for _ in range(3)))
+
+    assert sorted(_run(many()), key=str) == [None, None, ANSWER]
+    assert _Stub.max_active == 1
+
+
+def test_stream_complete_calls_on_complete(use_stub):
+    use_stub("ok")
+    done = []
+    parts = _run(_collect(stream_with_llm(None, STATE, [1, 2], deadline=5, on_complete=done.append)))
+    assert "".join(parts) == ANSWER
+    assert done == [ANSWER]
+
+
+def test_stream_stops_at_deadline(use_stub):
+    use_stub("stall")
+    done = []
+    start = time.perf_counter()
+    parts = _run(_collect(stream_with_llm(None, STATE, [1, 2], deadline=0.5, on_complete=done.append)))
+    assert parts == ["推荐", "走"]
+    assert done == []  # 没收完，不交给缓存
+    assert time.perf_counter() - start < SLOW_SECONDS / 2
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # 讲解接口不用进程池，不必在测试里拉起子进程
+    monkeypatch.setattr(main, "prestart_pool", lambda: None)
+    with TestClient(main.app) as c:
+        yield c
+
+
+def _local_explanation():
+    classification, err = main.classify_after(STATE["nodes"], STATE["edges"], [], STATE["pathEndpoint"])
+    return explain_locally(classification, err, main.pick_next_move(classification))
+
+
+@pytest.mark.parametrize("mode", ["slow", "error"])
+def test_explain_endpoint_falls_back_to_local(use_stub, client, mode, monkeypatch):
+    use_stub(mode)
+    monkeypatch.setattr(llm_client, "LLM_DEADLINE", 0.3)
+    start = time.perf_counter()
+    body = client.post("/explain", json=STATE).json()
+    assert time.perf_counter() - start < SLOW_SECONDS / 2
+    assert body["source"] == "local" and body["cached"] is False
+    assert body["explanation"] == _local_explanation()
+
+
+@pytest.mark.parametrize("mode", ["slow", "error"])
+def test_explain_stream_falls_back_to_local(use_stub, client, mode, monkeypatch):
+    use_stub(mode)
+    monkeypatch.setattr(llm_client, "LLM_DEADLINE", 0.3)
+    text = client.post("/explain?stream=true", json=STATE).text
+    events = [block.split("\n", 1) for block in text.strip().split("\n\n")]
+    assert [name for name, _ in events] == ["event: delta", "event: done"]
+    assert json.loads(events[0][1][len("data: "):])["text"] == _local_explanation()
+    assert json.loads(events[1][1][len("data: "):])["source"] == "local"
@@ -0,0 +1,57 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+TRIANGLE = {"nodes": [1, 2, 3], "edges": [[1, 2], [2, 3], [3, 1]]}
+
+
+@pytest.fixture
+def ws(monkeypatch):
+    # 对局通道不用进程池，不必在测试里拉起子进程
+    monkeypatch.setattr(main, "prestart_pool", lambda: None)
+    with TestClient(main.app) as client, client.websocket_connect("/ws/play") as websocket:
+        yield websocket
+
+
+def _send(ws, message):
+    ws.send_json(message)
+    return ws.receive_json()
+
+
+def test_open_and_play(ws):
+    reply = _send(ws, {"type": "open", **TRIANGLE})
+    assert reply == {"type": "open", "ok": True, "endpoint": None, "remaining": 3, "done": False}
+    assert _send(ws, {"type": "move", "from": 1, "to": 2})["remaining"] == 2
+    assert _send(ws, {"type": "hint"})["ok"] is True
+
+
+def test_open_by_level(ws):
+    reply = _send(ws, {"type": "open", "difficulty": "easy", "index": 3})
+    assert reply["ok"] is True
+    assert reply["level"] == main.levels.get("easy", 3)
+
+
+@pytest.mark.parametrize("edges", ["x", [[1, 2, 3]], [[1, "a"]], [1, 2]])
+def test_open_rejects_malformed_edges(ws, edges):
+    reply = _send(ws, {"type": "open", "nodes": [1, 2, 3], "edges": edges})
+    assert reply["type"] == "open" and reply["ok"] is False
+    assert reply["message"].startswith("关卡数据格式错误")
+    # 没有打开任何关卡，后续走步不会被当成通关
+    assert _send(ws, {"type": "move", "from": 1, "to": 2}) == {
+        "type": "move", "ok": False, "message": "请先发送 open 消息打开关卡",
+    }
+
+
+def test_failed_open_keeps_previous_level(ws):
+    _send(ws, {"type": "open", **TRIANGLE})
+    assert _send(ws, {"type": "open", "edges": "x"})["ok"] is False
+    assert _send(ws, {"type": "move", "from": 1, "to": 2})["remaining"] == 2
+
+
+def test_binary_and_invalid_frames_keep_connection(ws):
+    ws.send_bytes(b"\x00\x01")
+    assert ws.receive_json() == {"type": None, "ok": False, "message": "不支持二进制消息，请以 JSON 文本发送"}
+    ws.send_text("{not json")
+    assert ws.receive_json() == {"type": None, "ok": False, "message": "消息不是有效的 JSON"}
+    assert _send(ws, {"type": "open", **TRIANGLE})["ok"] is True
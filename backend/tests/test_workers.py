@@ -0,0 +1,29 @@
+import pytest
+
+from services import workers
+from services.workers import OFFLOAD_MAX_PENDING, OFFLOAD_MIN_EDGES, Overloaded, offload
+
+
+class _ClosedPool:
+    def submit(self, *args, **kwargs):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+
+def test_failed_submit_returns_slot(monkeypatch):
+    monkeypatch.setattr(workers, "get_pool", lambda: _ClosedPool())
+    # 提交失败的次数超过名额总数，名额仍然都在：每次都是原样抛出，而不是变成“繁忙”
+    for _ in range(OFFLOAD_MAX_PENDING + 1):
+        with pytest.raises(RuntimeError):
+            offload(sum, [1, 2], size=OFFLOAD_MIN_EDGES)
+
+
+def test_small_request_runs_inline(monkeypatch):
+    monkeypatch.setattr(workers, "get_pool", lambda: _ClosedPool())
+    assert offload(sum, [1, 2], size=OFFLOAD_MIN_EDGES - 1) == 3
+
+
+def test_full_slots_raise_overloaded(monkeypatch):
+    monkeypatch.setattr(workers, "_offload_slots", workers.threading.BoundedSemaphore(1))
+    workers._offload_slots.acquire()
+    with pytest.raises(Overloaded):
+        offload(sum, [1, 2], size=OFFLOAD_MIN_EDGES)
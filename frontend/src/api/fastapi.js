@@ -1,11 +1,55 @@
 import axios from "axios";
 const api = axios.create({ baseURL: "/api" });
 export const fetchDemo = () => api.get("/generate").then((r) => r.data);
-export const fetchLevel = (difficulty, index = 1) =>
-  api.get(`/level`, { params: { difficulty, index } }).then((r) => r.data);
-export const solveGraph = (graph) =>
-  api.post("/solve", graph).then((r) => r.data);
+// layout=true：附带服务端算好的归一化坐标（每关只算一次）
+export const fetchLevel = (difficulty, index = 1, layout = true) =>
+  api.get(`/level`, { params: { difficulty, index, layout } }).then((r) => r.data);
+// 新增：记住最近的 /solve 结果与 ETag，重复求解同一关卡时只发条件请求（304 不带响应体）
+const solveCache = new Map();
+const SOLVE_CACHE_SIZE = 100;
+export const solveGraph = (graph) => {
+  const key = JSON.stringify(graph);
+  const cached = solveCache.get(key);
+  return api
+    .post("/solve", graph, {
+      headers: cached ? { "If-None-Match": cached.etag } : {},
+      validateStatus: (s) => (s >= 200 && s < 300) || s === 304,
+    })
+    .then((r) => {
+      if (r.status === 304 && cached) return cached.data;
+      if (r.headers.etag) {
+        solveCache.delete(key);
+        solveCache.set(key, { etag: r.headers.etag, data: r.data });
+        if (solveCache.size > SOLVE_CACHE_SIZE)
+          solveCache.delete(solveCache.keys().next().value);
+      }
+      return r.data;
+    });
+};
 
 // 新增：下一步提示
 export const hintNext = (payload) =>
   api.post("/hint", payload).then((r) => r.data);
+
+// 新增：WebSocket 对局通道（一次连接内连续发送走步 / 撤销 / 提示）
+// 用法：const ch = openPlayChannel((msg) => {...}); ch.open({ difficulty, index }); ch.move(to, from); ch.hint();
+export const openPlayChannel = (onMessage) => {
+  const scheme = window.location.protocol === "https:" ? "wss" : "ws";
+  const ws = new WebSocket(`${scheme}://${window.location.host}/api/ws/play`);
+  const queue = [];
+  const send = (msg) => {
+    const data = JSON.stringify(msg);
+    if (ws.readyState === WebSocket.OPEN) ws.send(data);
+    else queue.push(data);
+  };
+  ws.onopen = () => queue.splice(0).forEach((data) => ws.send(data));
+  ws.onmessage = (e) => onMessage(JSON.parse(e.data));
+  return {
+    open: (level) => send({ type: "open", ...level }),
+    move: (to, from = null, hint = false) =>
+      send({ type: "move", to, ...(from === null ? {} : { from }), hint }),
+    undo: () => send({ type: "undo" }),
+    hint: (detail = false) => send({ type: "hint", detail }),
+    close: () => ws.close(),
+  };
+};
@@ -1,6 +1,6 @@
 import networkx as nx
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
+
+from renderer import render_animation
 
 # ====== Step 1: 构建图 ======
 G = nx.Graph()
@@ -22,25 +22,13 @@ print("欧拉路径：", path)
 
 pos = nx.spring_layout(G, seed=42)
 
-# ====== Step 2: 初始化绘图 ======
-fig, ax = plt.subplots()
-nx.draw(G, pos, with_labels=True, node_size=800, node_color="lightblue")
-
-# ====== Step 3: 动画更新函数 ======
-def update(frame):
-    ax.clear()
-    nx.draw(G, pos, with_labels=True, node_size=800, node_color="lightblue")
-    nx.draw_networkx_edges(G, pos, edgelist=path[:frame+1], width=3, edge_color="red")
-    if frame < len(path):
-        u, v = path[frame]
-        ax.set_title(f"Step {frame+1}: {u} → {v}")
-    else:
-        ax.set_title("✅ 完成！")
-
-# ====== Step 4: 创建动画 ======
-ani = animation.FuncAnimation(fig, update, frames=len(path), interval=1000, repeat=False)
+# ====== Step 2: 每一帧的状态 ======
+# (已走过的边, 当前尝试的边, 标题)：第 i 帧已走完前 i+1 步，最后补一帧完成画面
+frames = [(path[:i + 1], None, f"Step {i + 1}: {u} → {v}") for i, (u, v) in enumerate(path)]
+frames.append((path, None, "✅ 完成！"))
 
-# ====== Step 5: 导出 GIF ======
-ani.save("euler_path.gif", writer="pillow", fps=1)
-plt.close()
-print("GIF 动画已保存为 euler_path.gif ✅")
+# ====== Step 3: 导出 GIF ======
+# 图形只建一次，每帧只改变化的边，直接流式写入 GIF（不再每帧 ax.clear() 重画整张图）
+if __name__ == "__main__":
+    render_animation(list(G.nodes()), list(G.edges()), pos, frames, "euler_path.gif", fps=1)
+    print("GIF 动画已保存为 euler_path.gif ✅")
@@ -0,0 +1,227 @@
+"""
+流式动画渲染：图形与静态元素只建一次，每帧只改动发生变化的边 / 顶点 / 序号，
+渲染结果以 RGBA 缓冲区直接写入 GIF / MP4，不落地任何中间文件。
+
+    from renderer import render_animation
+    states = [([(0, 1)], (1, 2)), ([(0, 1), (1, 2)], None)]   # (已走的边, 正在尝试的边[, 标题])
+    render_animation(nodes, edges, pos, states, "out.gif", fps=2, workers=4)
+
+输出 .gif 用 Pillow；.mp4 等格式需要额外安装 imageio-ffmpeg。
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import imageio
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D, IdentityTransform
+
+# 边 / 顶点的三种状态：未走、已走、正在尝试
+EDGE_STYLES = {0: ("lightgray", 2.0), 1: ("blue", 4.0), 2: ("orange", 4.0)}
+NODE_COLORS = {False: "lightblue", True: "green"}
+
+Edge = Tuple[Hashable, Hashable]
+State = Tuple  # (已走的边列表, 正在尝试的边或 None[, 标题])
+
+
+class GraphAnimator:
+    """
+    一张图的逐帧渲染器。Figure 直接挂在 Agg 画布上（不经过 pyplot，也不会打开窗口），
+    所有边画在一个 LineCollection 里、顶点画在一个散点集合里；
+    顶点名和边的序号预先转成字形路径，各画在一个 PathCollection 里（逐个 Text 排版是最慢的部分）。
+    每帧只对比上一帧的状态，改动变化的颜色 / 线宽 / 序号，然后重绘到内存缓冲区。
+    """
+
+    def __init__(self, nodes: Sequence[Hashable], edges: Sequence[Edge], pos: Dict[Hashable, Sequence[float]],
+                 figsize: Tuple[float, float] = (5, 5), dpi: int = 100, node_size: float = 800):
+        self.nodes = list(nodes)
+        self.edges = [tuple(e) for e in edges]
+        self.node_index = {n: i for i, n in enumerate(self.nodes)}
+        # (u, v) 与 (v, u) 都指向同一条边；重复边按出现顺序依次占用
+        self.edge_index: Dict[Edge, List[int]] = {}
+        for i, (u, v) in enumerate(self.edges):
+            self.edge_index.setdefault((u, v), []).append(i)
+            if u != v:
+                self.edge_index.setdefault((v, u), []).append(i)
+
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        ax = self.figure.add_axes([0, 0, 1, 0.92])
+        ax.set_axis_off()
+        xy = np.array([pos[n] for n in self.nodes], dtype=float)
+        low, high = xy.min(axis=0), xy.max(axis=0)
+        pad = max(float((high - low).max()) * 0.15, 0.1)
+        ax.set_xlim(low[0] - pad, high[0] + pad)
+        ax.set_ylim(low[1] - pad, high[1] + pad)
+
+        segments = [(pos[u], pos[v]) for u, v in self.edges]
+        color, width = EDGE_STYLES[0]
+        self._edge_colors = [color] * len(self.edges)
+        self._edge_widths = [width] * len(self.edges)
+        self._edge_lines = LineCollection(segments, colors=self._edge_colors, linewidths=self._edge_widths, zorder=1)
+        ax.add_collection(self._edge_lines)
+        self._node_colors = [NODE_COLORS[False]] * len(self.nodes)
+        self._node_dots = ax.scatter(xy[:, 0], xy[:, 1], s=node_size, c=self._node_colors, zorder=2)
+        self._glyphs: Dict[Tuple[str, bool], object] = {}
+        self._pixels_per_point = dpi / 72
+        ax.add_collection(PathCollection(
+            [self._glyph(str(n), False) for n in self.nodes], offsets=xy, offset_transform=ax.transData,
+            transform=IdentityTransform(), facecolors="black", edgecolors="none", zorder=3,
+        ))
+        # 序号写在边中点略上方
+        self._order_anchor = np.array(
+            [((pos[u][0] + pos[v][0]) / 2, (pos[u][1] + pos[v][1]) / 2 + pad / 3) for u, v in self.edges], dtype=float
+        ).reshape(-1, 2)
+        self._order_marks = PathCollection(
+            [], offsets=np.empty((0, 2)), offset_transform=ax.transData,
+            transform=IdentityTransform(), facecolors="red", edgecolors="none", zorder=4,
+        )
+        ax.add_collection(self._order_marks)
+        self._title = self.figure.text(0.5, 0.96, "", ha="center", va="center", fontsize=12)
+
+        self._edge_state = [0] * len(self.edges)
+        self._edge_order = [""] * len(self.edges)
+        self._node_used = [False] * len(self.nodes)
+
+    def _glyph(self, text: str, bold: bool, size: float = 12):
+        """文字的字形路径（像素单位，以文字中心为原点），按内容缓存。"""
+        key = (text, bold)
+        path = self._glyphs.get(key)
+        if path is None:
+            prop = FontProperties(weight="bold" if bold else "normal")
+            path = TextPath((0, 0), text, size=size * self._pixels_per_point, prop=prop)
+            box = path.get_extents()
+            path = path.transformed(Affine2D().translate(-(box.x0 + box.x1) / 2, -(box.y0 + box.y1) / 2))
+            self._glyphs[key] = path
+        return path
+
+    def _resolve(self, path_edges: Iterable[Edge]) -> List[int]:
+        taken: Dict[Edge, int] = {}
+        ids = []
+        for edge in path_edges:
+            edge = tuple(edge)
+            k = taken.get(edge, 0)
+            ids.append(self.edge_index[edge][k])
+            taken[edge] = k + 1
+            if edge[0] != edge[1]:
+                taken[(edge[1], edge[0])] = k + 1
+        return ids
+
+    def frame(self, path_edges: Sequence[Edge], current: Optional[Edge] = None, title: str = "") -> np.ndarray:
+        """渲染一帧，返回 (H, W, 4) 的 uint8 数组（指向画布缓冲区，下一帧会被覆盖）。"""
+        state = [0] * len(self.edges)
+        order = [""] * len(self.edges)
+        used = [False] * len(self.nodes)
+        for step, eid in enumerate(self._resolve(path_edges), 1):
+            state[eid] = 1
+            order[eid] = str(step)
+            u, v = self.edges[eid]
+            used[self.node_index[u]] = used[self.node_index[v]] = True
+        if current is not None:
+            free = [eid for eid in self.edge_index[tuple(current)] if state[eid] == 0]
+            if free:
+                state[free[0]] = 2
+
+        # 只改动和上一帧不同的部分
+        if state != self._edge_state:
+            for eid, (old, new) in enumerate(zip(self._edge_state, state)):
+                if old != new:
+                    self._edge_colors[eid], self._edge_widths[eid] = EDGE_STYLES[new]
+            self._edge_lines.set_color(self._edge_colors)
+            self._edge_lines.set_linewidth(self._edge_widths)
+            self._edge_state = state
+        if used != self._node_used:
+            self._node_colors = [NODE_COLORS[flag] for flag in used]
+            self._node_dots.set_facecolor(self._node_colors)
+            self._node_used = used
+        if order != self._edge_order:
+            shown = [eid for eid, text in enumerate(order) if text]
+            self._order_marks.set_paths([self._glyph(order[eid], True) for eid in shown])
+            self._order_marks.set_offsets(self._order_anchor[shown])
+            self._edge_order = order
+        if self._title.get_text() != title:
+            self._title.set_text(title)
+
+        self.canvas.draw()
+        return np.asarray(self.canvas.buffer_rgba())
+
+
+def _unpack(state: State) -> Tuple[Sequence[Edge], Optional[Edge], str]:
+    path_edges, current = state[0], state[1]
+    title = state[2] if len(state) > 2 else ""
+    return path_edges, current, title
+
+
+# 多进程渲染：每个子进程各建一个 GraphAnimator，按块渲染后按顺序交回
+
+_worker_animator: Optional[GraphAnimator] = None
+
+
+def _init_worker(args, kwargs) -> None:
+    global _worker_animator
+    _worker_animator = GraphAnimator(*args, **kwargs)
+
+
+def _render_chunk(states: Sequence[State]) -> List[np.ndarray]:
+    # 缓冲区会被下一帧覆盖，交回主进程前只保留 RGB 的副本
+    return [_worker_animator.frame(*_unpack(state))[..., :3].copy() for state in states]
+
+
+def iter_frames(nodes, edges, pos, states: Iterable[State], workers: int = 1, chunksize: int = 32,
+                **kwargs) -> Iterable[np.ndarray]:
+    """
+    按顺序逐帧产出 RGB 数组。workers > 1 时按 chunksize 分块交给进程池并行渲染，
+    结果仍按原顺序产出。同时提交的块不超过 workers * 2 个，消费掉一块才补交下一块，
+    主进程里最多只积压这么多块的帧；states 也是按需读取的，可以是生成器。
+    """
+    if workers <= 1:
+        animator = GraphAnimator(nodes, edges, pos, **kwargs)
+        for state in states:
+            yield animator.frame(*_unpack(state))[..., :3]
+        return
+    states = iter(states)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=((nodes, edges, pos), kwargs)) as executor:
+        pending = deque()
+
+        def submit_next() -> bool:
+            chunk = list(islice(states, chunksize))
+            if chunk:
+                pending.append(executor.submit(_render_chunk, chunk))
+            return bool(chunk)
+
+        try:
+            while len(pending) < workers * 2 and submit_next():
+                pass
+            while pending:
+                frames = pending.popleft().result()
+                submit_next()
+                yield from frames
+        finally:
+            # 调用方提前停止迭代时取消还没开始的块
+            for future in pending:
+                future.cancel()
+
+
+def open_writer(output: str, fps: float):
+    """GIF 用 Pillow 写（每帧时长以毫秒计，无限循环），其它格式交给 imageio-ffmpeg。"""
+    if output.lower().endswith(".gif"):
+        return imageio.v2.get_writer(output, mode="I", duration=1000 / fps, loop=0)
+    return imageio.v2.get_writer(output, fps=fps)
+
+
+def render_animation(nodes, edges, pos, states: Iterable[State], output: str, fps: float = 1,
+                     workers: int = 1, chunksize: int = 32, **kwargs) -> int:
+    """把一串搜索状态渲染成动画文件，边渲染边写入；返回帧数。"""
+    count = 0
+    with open_writer(output, fps) as writer:
+        for frame in iter_frames(nodes, edges, pos, states, workers, chunksize, **kwargs):
+            writer.append_data(frame)
+            count += 1
+    return count